@@ -0,0 +1,260 @@
+# Times the shared feature engine against the per-shop extract_features it
+# replaced, over spec blocks recorded from archived product pages. --check
+# only compares their output instead, and exits non-zero on any difference.
+# Run from the dags folder:
+#   python -m ETL.benchmarks.features_benchmark --archive-dir /opt/airflow/archive [--check]
+import argparse
+import json
+import re
+import time
+from ETL.libs.archive import HtmlArchive
+from ETL.libs.features import empty_features
+from ETL.libs.parsing import make_soup
+from ETL.products import ProductsETL
+from ETL.benchmarks.parser_benchmark import SHOPS, product_pages
+
+DEFAULT_REPEAT = 200
+
+
+# The shops' own code before the engine, as it ran on the spec text.
+
+def emcor_original(text: str) -> dict:
+    feature_data = empty_features()
+    patterns = {
+        'height': r'Height:\s*([\d.]+)\s*mm',
+        'width': r'Width:\s*([\d.]+)\s*mm',
+        'length': r'(?:Depth|Length):\s*([\d.]+)\s*mm',
+        'gross_weight': r'Weight:\s*(\d+\.?\d*)\s*g',
+        'net_weight': r'Net Weight:\s*(\d+\.?\d*)\s*g',
+        'screen_size': r'Size:\s*([\d.]+)\s*inches|(\d+\.\d+‑inch)',
+        'sim_slot': r'SIM.*(?:Dual SIM|nano-SIM|eSIM)',
+        'processor': r'(CPU Model|Chip|Processor):\s*(.*?)(?:\n|$)',
+        'memory': r'Memory.*\n•\s*([\dA-Z +]+)',
+        'camera': r'(?:Camera|Rear Camera|Advanced dual-camera system|TrueDepth Camera)',
+        'battery': r'Battery.*\n•\s*Capacity:?\s*(.*?)(?:\n|$)|Power and Battery.*Video playback:.*'
+    }
+
+    for key, pattern in patterns.items():
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            feature_data[key] = next(
+                (g for g in match.groups() if g), match.group())
+
+    return feature_data
+
+
+def kimstore_original(text: str) -> dict:
+    # The battery capacity and eSIM checks are case-insensitive, as in
+    # the engine's rules, the original compared them to a lower-cased line.
+    feature_data = empty_features()
+    for line in text.splitlines():
+        norm_line = line.lower()
+
+        if 'height' in norm_line and 'mm' in norm_line:
+            match = re.search(r'height.*?([\d.]+)\s*mm', norm_line)
+            if match:
+                feature_data['height'] = match.group(1)
+        if 'width' in norm_line and 'mm' in norm_line:
+            match = re.search(r'width.*?([\d.]+)\s*mm', norm_line)
+            if match:
+                feature_data['width'] = match.group(1)
+        if ('depth' in norm_line or 'length' in norm_line) and 'mm' in norm_line:
+            match = re.search(
+                r'(?:depth|length).*?([\d.]+)\s*mm', norm_line)
+            if match:
+                feature_data['length'] = match.group(1)
+
+        if 'weight' in norm_line and 'g' in norm_line:
+            match = re.findall(r'([\d,]+)\s*g', norm_line)
+            if match:
+                weight = match[0].replace(',', '')
+                if not feature_data['net_weight']:
+                    feature_data['net_weight'] = weight
+                elif not feature_data['gross_weight']:
+                    feature_data['gross_weight'] = weight
+
+        if 'display' in norm_line or 'screen' in norm_line:
+            match = re.search(
+                r'(\d{1,2}\.?\d*)\s*(inches|inch)', norm_line)
+            if match:
+                feature_data['screen_size'] = match.group(1)
+
+        if 'sim' in norm_line:
+            if 'dual' in norm_line:
+                feature_data['sim_slot'] = 'Dual SIM'
+            elif 'single' in norm_line:
+                feature_data['sim_slot'] = 'Single SIM'
+            elif 'esim' in norm_line:
+                feature_data['sim_slot'] = 'eSIM'
+
+        if any(term in norm_line for term in ['chip', 'chipset', 'processor', 'cpu']):
+            feature_data['processor'] = line.strip()
+
+        if 'ram' in norm_line and 'rom' in norm_line:
+            feature_data['memory'] = line.strip()
+
+        if 'camera' in norm_line:
+            if not feature_data['camera']:
+                feature_data['camera'] = line.strip()
+
+        if 'battery' in norm_line and not feature_data['battery']:
+            match = re.search(r'(\d{3,5})\s*mah', norm_line)
+            if match:
+                feature_data['battery'] = match.group(1)
+            else:
+                feature_data['battery'] = line.strip()
+
+    return feature_data
+
+
+def compasia_original(text: str) -> dict:
+    feature_data = empty_features()
+
+    dim_match = re.search(
+        r'Dimensions:\s*(\d+(\.\d+)?)\s*x\s*(\d+(\.\d+)?)\s*x\s*(\d+(\.\d+)?)\s*mm', text)
+    if dim_match:
+        length, width, height = map(float, dim_match.groups()[::2])
+        feature_data['length'] = length
+        feature_data['width'] = width
+        feature_data['height'] = height
+
+    weight_match = re.search(r'Weight:\s*(\d+(\.\d+)?)\s*g', text)
+    if weight_match:
+        weight = float(weight_match.group(1))
+        feature_data['gross_weight'] = weight
+        feature_data['net_weight'] = weight
+
+    sim_match = re.search(r'SIM:\s*(.+)', text)
+    if sim_match:
+        feature_data['sim_slot'] = sim_match.group(1).strip()
+
+    cpu_match = re.search(r'CPU:\s*(.+)', text)
+    if cpu_match:
+        feature_data['processor'] = cpu_match.group(1).strip()
+
+    ram_match = re.search(r'RAM:\s*(\d+GB)', text)
+    rom_match = re.search(r'ROM:\s*(\d+GB)', text)
+    if ram_match and rom_match:
+        feature_data['memory'] = f"{ram_match.group(1)} RAM + {rom_match.group(1)} ROM"
+
+    rear_camera_match = re.search(
+        r'Rear Camera:\s*(.+?)(?=Selfie Camera:)', text, re.DOTALL)
+    selfie_camera_match = re.search(r'Selfie Camera:\s*(.+)', text)
+    camera_parts = []
+    if rear_camera_match:
+        camera_parts.append(
+            "Rear: " + rear_camera_match.group(1).replace('\n', ' ').strip())
+    if selfie_camera_match:
+        camera_parts.append(
+            "Front: " + selfie_camera_match.group(1).strip())
+    if camera_parts:
+        feature_data['camera'] = ' | '.join(camera_parts)
+
+    return feature_data
+
+
+ORIGINALS = {
+    "CompAsia": compasia_original,
+    "Emcor": emcor_original,
+    "KimStore": kimstore_original,
+}
+
+
+def shop_etl(shop: str) -> ProductsETL:
+    cls, url, link = SHOPS[shop]
+    return cls(shop, url, link)
+
+
+def record_blocks(archive: HtmlArchive, max_pages: int) -> dict:
+    blocks = {}
+    for shop in ORIGINALS:
+        etl = shop_etl(shop)
+        blocks[shop] = [etl.spec_text(make_soup(html, etl.parser))
+                        for _, html in product_pages(archive, etl, max_pages)]
+    return blocks
+
+
+def time_per_block(fn, blocks: list, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in blocks:
+            fn(text)
+    return (time.perf_counter() - start) / (repeat * len(blocks))
+
+
+def check_shop(shop: str, blocks: list) -> int:
+    # Number of blocks the engine extracts differently, printing the fields
+    # that differ as (original, engine).
+    if shop not in ORIGINALS:
+        return 0
+
+    etl = shop_etl(shop)
+    original = ORIGINALS[shop]
+    different = 0
+    for i, text in enumerate(blocks):
+        before, after = original(text), etl.features_from_text(text)
+        if before != after:
+            different += 1
+            print(f"{shop} block {i}: " + str({field: (before.get(field), after.get(field))
+                                               for field in sorted(set(before) | set(after))
+                                               if before.get(field) != after.get(field)}))
+    print(f"{shop}: {len(blocks) - different}/{len(blocks)} blocks identical.")
+    return different
+
+
+def benchmark_shop(shop: str, blocks: list, repeat: int):
+    if shop not in ORIGINALS:
+        return
+    if not blocks:
+        print(f"{shop}: no recorded spec blocks.")
+        return
+
+    etl = shop_etl(shop)
+    original = ORIGINALS[shop]
+    # Compiles the shop's rules before timing, as a run does once per process.
+    etl.features_from_text("")
+
+    before = time_per_block(original, blocks, repeat)
+    engine = time_per_block(etl.features_from_text, blocks, repeat)
+
+    equal = sum(etl.features_from_text(text) ==
+                original(text) for text in blocks)
+    print(f"{shop:<14}{len(blocks):>8}{len(etl.FEATURE_RULES):>8}{before * 1e6:>14.1f}"
+          f"{engine * 1e6:>12.1f}{before / engine:>10.2f}{equal:>7}/{len(blocks)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the shared feature engine with the per-shop code it replaced.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--archive-dir")
+    source.add_argument("--blocks", help="JSON file of recorded spec blocks.")
+    parser.add_argument("--record", help="Write the recorded spec blocks to this JSON file.")
+    parser.add_argument("--check", action="store_true",
+                        help="Only compare the output, exit 1 if it differs.")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--max-pages", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.blocks:
+        with open(args.blocks) as f:
+            blocks = json.load(f)
+    else:
+        blocks = record_blocks(HtmlArchive(args.archive_dir), args.max_pages)
+
+    if args.record:
+        with open(args.record, "w") as f:
+            json.dump(blocks, f)
+
+    if args.check:
+        different = sum(check_shop(shop, shop_blocks)
+                        for shop, shop_blocks in blocks.items())
+        raise SystemExit(1 if different else 0)
+
+    print(f"{'shop':<14}{'blocks':>8}{'rules':>8}{'original us':>14}{'engine us':>12}{'speedup':>10}{'equal':>10}")
+    for shop, shop_blocks in blocks.items():
+        benchmark_shop(shop, shop_blocks, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# Compares parse time and transform output of each parser, on the whole page
+# and on the shop's PARSE_REGIONS, over archived product pages. Run from the dags folder:
+#   python -m ETL.benchmarks.parser_benchmark --archive-dir /opt/airflow/archive
+import argparse
+import statistics
+import time
+from ETL.libs.archive import HtmlArchive
+from ETL.libs.parsing import PARSERS, DEFAULT_PARSER, HAS_LXML, make_soup, extract_regions
+from ETL.libs.rate_limit import get_host
+from ETL.products import (
+    AbensonETL,
+    AnsonsETL,
+    CompAsiaETL,
+    EmcorETL,
+    KimStoreETL,
+    MxmemoxpressETL,
+    MyPhoneETL,
+    PcxETL,
+    SavenearnETL,
+)
+
+SHOPS = {
+    "Abenson": (AbensonETL, 'https://www.abenson.com', '/mobile/smartphone.html'),
+    "Ansons": (AnsonsETL, 'https://ansons.ph', '/product-category/smartphones/'),
+    "CompAsia": (CompAsiaETL, 'https://compasia.com.ph', '/collections/smartphones'),
+    "Emcor": (EmcorETL, 'https://emcor.com.ph', '/product-category/it-products/smartphone/'),
+    "KimStore": (KimStoreETL, 'https://www.kimstore.com', '/collections/smartphones'),
+    "MxMemoXpress": (MxmemoxpressETL, 'https://mxmemoxpress.com', '/all-mobiles'),
+    "MyPhone": (MyPhoneETL, 'https://www.myphone.com.ph', '/smartphone'),
+    "PCX": (PcxETL, 'https://pcx.com.ph', '/collections/smartphones'),
+    "SavenEarn": (SavenearnETL, 'https://savenearn.com.ph', '/collections/smartphone'),
+}
+
+DEFAULT_REPEAT = 3
+DEFAULT_MAX_PAGES = 50
+
+
+def product_pages(archive: HtmlArchive, etl, max_pages: int) -> list:
+    host = get_host(etl.URL)
+    pages = []
+    for url in archive.urls():
+        # Skip captured responses and catalogue JSON, keep HTML documents.
+        if '#' in url or get_host(url) != host:
+            continue
+
+        html = archive.get(url)
+        if not html or not html.lstrip().startswith('<'):
+            continue
+
+        soup = make_soup(html, DEFAULT_PARSER)
+        if etl.PRODUCT_SELECTORS and not all(soup.select_one(s) for s in etl.PRODUCT_SELECTORS):
+            continue
+
+        pages.append((url, html))
+        if len(pages) >= max_pages:
+            break
+    return pages
+
+
+def run_transform(etl, soup, url):
+    try:
+        return etl.transform(soup, url)
+    except Exception as e:
+        return e
+
+
+def same_output(expected, actual) -> bool:
+    if isinstance(expected, Exception) or isinstance(actual, Exception):
+        return type(expected) is type(actual)
+    if expected is None or actual is None:
+        return expected is actual
+    return expected.reset_index(drop=True).equals(actual.reset_index(drop=True))
+
+
+def benchmark_shop(shop: str, archive: HtmlArchive, repeat: int, max_pages: int):
+    cls, url, link = SHOPS[shop]
+    etl = cls(shop, url, link)
+    pages = product_pages(archive, etl, max_pages)
+    if not pages:
+        print(f"{shop}: no archived product pages.")
+        return
+
+    parsers = [p for p in PARSERS if p != "lxml" or HAS_LXML]
+    variants = [(p, False) for p in parsers]
+    if cls.PARSE_REGIONS:
+        variants += [(p, True) for p in parsers]
+
+    baseline = {}
+    results = {}
+    for parser, partial in variants:
+        label = f"{parser}+regions" if partial else parser
+        timings = []
+        equal = 0
+        for page_url, html in pages:
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                if partial:
+                    soup = make_soup(extract_regions(
+                        html, cls.PARSE_REGIONS), parser)
+                else:
+                    soup = make_soup(html, parser)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings.append(best)
+
+            output = run_transform(etl, soup, page_url)
+            if label == DEFAULT_PARSER:
+                baseline[page_url] = output
+            if same_output(baseline[page_url], output):
+                equal += 1
+            else:
+                print(f"{shop}: {label} output differs for {page_url}")
+
+        results[label] = (timings, equal)
+
+    base_total = sum(results[DEFAULT_PARSER][0])
+    kb = sum(len(html) for _, html in pages) / 1024
+    print(f"\n{shop}: {len(pages)} pages, {kb:.0f} KB, configured parser {cls.PARSER}")
+    print(f"{'parser':<20}{'mean ms':>10}{'p95 ms':>10}{'total s':>10}{'speedup':>10}{'equal':>10}")
+    for parser, (timings, equal) in results.items():
+        total = sum(timings)
+        p95 = sorted(timings)[int(0.95 * (len(timings) - 1))]
+        print(f"{parser:<20}{statistics.mean(timings) * 1000:>10.1f}{p95 * 1000:>10.1f}"
+              f"{total:>10.2f}{base_total / total:>10.2f}{equal:>7}/{len(pages)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare HTML parsers over archived product pages.")
+    parser.add_argument("--archive-dir", required=True)
+    parser.add_argument("--shop", action="append", choices=list(SHOPS),
+                        help="Shops to benchmark, defaults to all of them.")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--max-pages", type=int, default=DEFAULT_MAX_PAGES)
+    args = parser.parse_args()
+
+    if not HAS_LXML:
+        print("lxml is not installed, only html.parser will be measured.")
+
+    archive = HtmlArchive(args.archive_dir)
+    for shop in args.shop or list(SHOPS):
+        benchmark_shop(shop, archive, args.repeat, args.max_pages)
+
+
+if __name__ == "__main__":
+    main()
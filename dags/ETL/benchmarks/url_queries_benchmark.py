@@ -0,0 +1,150 @@
+# Times the hot URL queries against a generated catalogue,
+# before and after the index migrations. Builds the schema from the
+# migrations in a scratch schema and drops it afterwards. Run from the dags
+# folder:
+#   python -m ETL.benchmarks.url_queries_benchmark --urls 1000000
+import argparse
+import json
+import re
+import time
+from sqlalchemy import text
+from ETL.libs.db import engine_from_env
+from ETL.libs.migrations import list_migrations
+from ETL.libs.utils import get_sql_from_file
+
+SCHEMA = "etl_bench"
+SHOP = "KimStore"
+DEFAULT_URLS = 1_000_000
+DEFAULT_REPEAT = 3
+
+# Share of URLs left to scrape, share of scraped ones due for a recheck,
+# and URLs staged by a listing refresh.
+UNSCRAPED_EVERY = 20
+STALE_EVERY = 20
+STAGED_URLS = 20_000
+
+# Hours, ProductsETL's default recheck_after. select_urls_to_recheck.sql
+# is what a default run reads its URLs with.
+RECHECK_AFTER = 24
+
+QUERIES = (
+    "select_unscraped_urls.sql",
+    "select_urls_to_recheck.sql",
+    "insert_into_urls.sql",
+)
+
+POPULATE = """
+INSERT INTO {schema}.urls (shop_id, url, scrape_status, updated_date)
+SELECT s.id, 'https://' || s.id || '.example.com/p/' || i,
+       CASE WHEN i % {unscraped_every} = 0 THEN 'NOT STARTED' ELSE 'DONE' END,
+       CASE WHEN i % {unscraped_every} = 0 THEN NULL
+            WHEN i % {stale_every} = 1 THEN NOW() - INTERVAL '{stale_hours} hours'
+            ELSE NOW() - INTERVAL '1 hour' END
+FROM generate_series(1, {urls}) AS i
+JOIN {schema}.stg_shops s ON s.id = 1 + i % (SELECT COUNT(*) FROM {schema}.stg_shops);
+
+-- Half of the staged URLs are already known, half are new.
+INSERT INTO {schema}.stg_urls (shop, url)
+SELECT s.name, u.url
+FROM {schema}.urls u
+JOIN {schema}.stg_shops s ON s.id = u.shop_id
+WHERE s.name = '{shop}'
+LIMIT {staged_urls} / 2;
+
+INSERT INTO {schema}.stg_urls (shop, url)
+SELECT s.name, 'https://' || s.id || '.example.com/new/' || i
+FROM generate_series(1, {staged_urls} / 2) AS i
+JOIN {schema}.stg_shops s ON s.name = '{shop}';
+
+ANALYZE;
+"""
+
+
+def in_schema(sql: str, schema: str = SCHEMA) -> str:
+    sql = sql.replace("SCHEMA IF NOT EXISTS etl;",
+                      f"SCHEMA IF NOT EXISTS {schema};")
+    return re.sub(r'\betl\.', f"{schema}.", sql)
+
+
+def run_sql(conn, sql: str):
+    # Passed to the driver as it is, % included.
+    return conn.exec_driver_sql(sql, execution_options={"no_parameters": True})
+
+
+def execution_time(conn, sql: str) -> float:
+    # EXPLAIN ANALYZE runs the statement, the caller rolls it back.
+    plan = run_sql(
+        conn, f"EXPLAIN (ANALYZE, FORMAT JSON) {sql.strip().rstrip(';')}").scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Execution Time"] / 1000
+
+
+def time_queries(engine, repeat: int) -> dict:
+    results = {}
+    for file_name in QUERIES:
+        sql = in_schema(get_sql_from_file(file_name).format(
+            shop=SHOP, recheck_after=float(RECHECK_AFTER)))
+        best = float("inf")
+        for _ in range(repeat):
+            with engine.connect() as conn:
+                transaction = conn.begin()
+                run_sql(conn, "SET LOCAL statement_timeout = 0")
+                best = min(best, execution_time(conn, sql))
+                transaction.rollback()
+        results[file_name] = best
+    return results
+
+
+def apply_migrations(engine, versions: list):
+    for migration in list_migrations():
+        if migration.version in versions:
+            with engine.begin() as conn:
+                run_sql(conn, "SET LOCAL statement_timeout = 0")
+                run_sql(conn, in_schema(migration.sql))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time the URL queries with and without indexes.")
+    parser.add_argument("--urls", type=int, default=DEFAULT_URLS)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--keep", action="store_true",
+                        help=f"Keep the {SCHEMA} schema afterwards.")
+    args = parser.parse_args()
+
+    engine = engine_from_env()
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+    try:
+        apply_migrations(engine, [1])
+        start = time.perf_counter()
+        with engine.begin() as conn:
+            run_sql(conn, "SET LOCAL statement_timeout = 0")
+            run_sql(conn, POPULATE.format(
+                schema=SCHEMA, shop=SHOP, urls=args.urls, unscraped_every=UNSCRAPED_EVERY,
+                stale_every=STALE_EVERY, stale_hours=2 * RECHECK_AFTER, staged_urls=STAGED_URLS))
+        print(
+            f"Generated {args.urls} URLs in {time.perf_counter() - start:.1f}s")
+
+        before = time_queries(engine, args.repeat)
+
+        start = time.perf_counter()
+        apply_migrations(engine, [migration.version for migration in list_migrations()
+                                  if migration.version > 1])
+        with engine.begin() as conn:
+            run_sql(conn, "ANALYZE")
+        print(f"Built the indexes in {time.perf_counter() - start:.1f}s")
+
+        after = time_queries(engine, args.repeat)
+
+        print(f"{'query':<36}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+        for file_name in QUERIES:
+            print(f"{file_name:<36}{before[file_name] * 1000:>12.1f}{after[file_name] * 1000:>12.1f}"
+                  f"{before[file_name] / max(after[file_name], 1e-9):>9.1f}x")
+
+    finally:
+        if not args.keep:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
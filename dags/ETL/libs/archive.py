@@ -0,0 +1,68 @@
+import os
+import gzip
+import json
+import hashlib
+import threading
+from datetime import datetime as dt
+
+
+class HtmlArchive:
+    def __init__(self, root: str):
+        self.root = root
+        self.index_path = os.path.join(root, "index.jsonl")
+        self._index = None
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], digest + ".gz")
+
+    def _load_index(self) -> dict:
+        if self._index is None:
+            self._index = {}
+            if os.path.exists(self.index_path):
+                with open(self.index_path, "r") as f:
+                    for line in f:
+                        entry = json.loads(line)
+                        self._index.setdefault(
+                            entry["url"], []).append(entry)
+        return self._index
+
+    def put(self, url: str, content: str, fetched_at: str = None) -> str:
+        data = content.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        entry = {
+            "url": url,
+            "fetched_at": fetched_at or dt.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "sha256": digest,
+            "bytes": len(data),
+        }
+
+        with self._lock:
+            path = self._object_path(digest)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = path + ".tmp"
+                with gzip.open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+
+            with open(self.index_path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+            self._load_index().setdefault(url, []).append(entry)
+
+        return digest
+
+    def get(self, url: str, before: str = None) -> str:
+        entries = self._load_index().get(url, [])
+        if before is not None:
+            entries = [e for e in entries if e["fetched_at"] <= before]
+        if not entries:
+            return None
+
+        entry = max(entries, key=lambda e: e["fetched_at"])
+        with gzip.open(self._object_path(entry["sha256"]), "rb") as f:
+            return f.read().decode("utf-8")
+
+    def urls(self) -> list:
+        return list(self._load_index())
@@ -0,0 +1,170 @@
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright, Error as PlaywrightError
+from fake_useragent import UserAgent
+
+BROWSER_LAUNCH_ARGS = {
+    "headless": True,
+    "args": ["--disable-blink-features=AutomationControlled"]
+}
+
+CONTEXT_ARGS = {
+    "locale": "en-US",
+    "viewport": {"width": 1280, "height": 800},
+    "device_scale_factor": 1,
+    "is_mobile": False,
+    "has_touch": False,
+    "screen": {"width": 1280, "height": 800},
+    "permissions": ["geolocation"],
+    "geolocation": {"latitude": 14.5995, "longitude": 120.9842},
+    "timezone_id": "Asia/Manila"
+}
+
+INIT_SCRIPT = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+
+
+class _ContextSlot:
+    def __init__(self, browser_index: int):
+        self.browser_index = browser_index
+        self.context = None
+        self.uses = 0
+
+
+class BrowserPool:
+    def __init__(self, n_browsers: int = 1, contexts_per_browser: int = 2, max_context_uses: int = 50,
+                 launch_args: dict = None, context_args: dict = None):
+        self.n_browsers = n_browsers
+        self.contexts_per_browser = contexts_per_browser
+        self.max_context_uses = max_context_uses
+        self.launch_args = launch_args or BROWSER_LAUNCH_ARGS
+        self.context_args = context_args or CONTEXT_ARGS
+
+        self._playwright = None
+        self._browsers = []
+        self._slots = None
+        self._start_lock = None
+
+        self.browser_launches = 0
+        self.context_launches = 0
+        self.context_recycles = 0
+        self.context_crashes = 0
+        self.pages_served = 0
+        self.acquire_time = 0.0
+
+    @property
+    def started(self) -> bool:
+        return self._playwright is not None
+
+    async def start(self):
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+
+        async with self._start_lock:
+            if self.started:
+                return
+
+            self._playwright = await async_playwright().start()
+            self._browsers = [None] * self.n_browsers
+            self._slots = asyncio.Queue()
+            for i in range(self.n_browsers):
+                for _ in range(self.contexts_per_browser):
+                    self._slots.put_nowait(_ContextSlot(i))
+
+    async def close(self):
+        if not self.started:
+            return
+
+        for browser in self._browsers:
+            if browser is not None:
+                try:
+                    await browser.close()
+                except PlaywrightError as e:
+                    print(f"Error closing browser: {e}")
+
+        await self._playwright.stop()
+        self._playwright = None
+        self._browsers = []
+        self._slots = None
+        print(f"Browser pool closed. Stats: {self.stats()}")
+
+    async def _get_browser(self, index: int):
+        browser = self._browsers[index]
+        if browser is None or not browser.is_connected():
+            browser = await self._playwright.chromium.launch(**self.launch_args)
+            self._browsers[index] = browser
+            self.browser_launches += 1
+
+        return browser
+
+    async def _discard_context(self, slot: _ContextSlot):
+        if slot.context is not None:
+            try:
+                await slot.context.close()
+            except PlaywrightError:
+                pass
+
+        slot.context = None
+        slot.uses = 0
+
+    async def _prepare_slot(self, slot: _ContextSlot):
+        if slot.context is not None and slot.uses >= self.max_context_uses:
+            await self._discard_context(slot)
+            self.context_recycles += 1
+
+        if slot.context is not None and not self._browsers[slot.browser_index].is_connected():
+            slot.context = None
+            slot.uses = 0
+
+        if slot.context is None:
+            browser = await self._get_browser(slot.browser_index)
+            slot.context = await browser.new_context(
+                user_agent=UserAgent().random, **self.context_args)
+            await slot.context.add_init_script(INIT_SCRIPT)
+            self.context_launches += 1
+
+    @asynccontextmanager
+    async def page(self):
+        await self.start()
+
+        start = time.perf_counter()
+        slot = await self._slots.get()
+        page = None
+        try:
+            await self._prepare_slot(slot)
+            page = await slot.context.new_page()
+            slot.uses += 1
+            self.pages_served += 1
+            self.acquire_time += time.perf_counter() - start
+
+            yield page
+
+        except Exception:
+            # Only throw the context away when the page or browser died with it,
+            # a selector timeout on a healthy page keeps the context reusable.
+            browser = self._browsers[slot.browser_index]
+            if page is None or page.is_closed() or browser is None or not browser.is_connected():
+                self.context_crashes += 1
+                await self._discard_context(slot)
+            raise
+
+        finally:
+            if page is not None and slot.context is not None:
+                try:
+                    await page.close()
+                except PlaywrightError:
+                    await self._discard_context(slot)
+
+            self._slots.put_nowait(slot)
+
+    def stats(self) -> dict:
+        reused = self.pages_served - self.context_launches
+        return {
+            "browser_launches": self.browser_launches,
+            "context_launches": self.context_launches,
+            "context_recycles": self.context_recycles,
+            "context_crashes": self.context_crashes,
+            "pages_served": self.pages_served,
+            "reuse_ratio": round(reused / self.pages_served, 3) if self.pages_served else 0.0,
+            "avg_acquire_time": round(self.acquire_time / self.pages_served, 4) if self.pages_served else 0.0,
+        }
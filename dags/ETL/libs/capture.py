@@ -0,0 +1,65 @@
+import re
+import asyncio
+from urllib.parse import urlparse, parse_qs
+
+
+class ResponseCapture:
+    def __init__(self, url_patterns: list, operations: list = None):
+        self.url_patterns = [re.compile(p) for p in url_patterns]
+        self.operations = set(operations or [])
+        self.bodies = []
+        self._updated = asyncio.Event()
+        self._tasks = []
+
+    def _operation_name(self, request) -> str:
+        # Magento PWA sends GraphQL queries as GET with operationName in the
+        # query string, other clients POST it in the JSON body.
+        names = parse_qs(urlparse(request.url).query).get("operationName")
+        if names:
+            return names[0]
+
+        try:
+            body = request.post_data_json
+        except Exception:
+            return None
+        return body.get("operationName") if isinstance(body, dict) else None
+
+    def matches(self, response) -> bool:
+        if not any(p.search(response.url) for p in self.url_patterns):
+            return False
+        if not self.operations:
+            return True
+        return self._operation_name(response.request) in self.operations
+
+    async def _read(self, response):
+        try:
+            body = await response.json()
+        except Exception as e:
+            print(f"Could not decode captured response {response.url}: {e}")
+            return
+
+        self.bodies.append(body)
+        self._updated.set()
+
+    def _on_response(self, response):
+        if self.matches(response):
+            self._tasks.append(asyncio.ensure_future(self._read(response)))
+
+    def attach(self, page):
+        page.on("response", self._on_response)
+
+    async def wait_for(self, is_complete, timeout: float) -> bool:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            self._updated.clear()
+            if is_complete(self.bodies):
+                return True
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(self._updated.wait(), remaining)
+            except asyncio.TimeoutError:
+                return is_complete(self.bodies)
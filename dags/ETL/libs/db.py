@@ -0,0 +1,103 @@
+import os
+import time
+import threading
+from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, Engine
+from sqlalchemy.pool import QueuePool
+from ETL.libs.metrics import Metrics
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+# Seconds before a pooled connection is replaced, under the server's and
+# any proxy's idle timeouts.
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+# Milliseconds, applied server side to every statement. 0 turns it off.
+STATEMENT_TIMEOUT = int(os.getenv("DB_STATEMENT_TIMEOUT", 300000))
+
+# Shared by every engine in the process.
+pool_metrics = Metrics("db pool")
+
+engines = {}
+_lock = threading.Lock()
+
+
+class TimedQueuePool(QueuePool):
+    # Records how long each checkout waited for a free connection.
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_metrics.observe("pool_checkout",
+                                 time.perf_counter() - start)
+            pool_metrics.incr("pool_checkouts")
+
+
+def get_engine(drivername: str, username: str, password: str, host: str, port: str, database: str,
+               pool_size: int = POOL_SIZE, max_overflow: int = MAX_OVERFLOW, pool_timeout: int = POOL_TIMEOUT,
+               pool_recycle: int = POOL_RECYCLE, statement_timeout: int = STATEMENT_TIMEOUT) -> Engine:
+    # One engine, and so one connection pool, per database and settings
+    # for the whole process.
+    url = URL.create(
+        drivername=drivername,
+        username=username,
+        password=password,
+        host=host,
+        port=port,
+        database=database,
+    )
+    key = (str(url), password, pool_size, max_overflow,
+           pool_timeout, pool_recycle, statement_timeout)
+
+    with _lock:
+        if key not in engines:
+            connect_args = {}
+            if statement_timeout:
+                connect_args["options"] = f"-c statement_timeout={statement_timeout}"
+            engines[key] = create_engine(
+                url,
+                poolclass=TimedQueuePool,
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+                pool_timeout=pool_timeout,
+                pool_recycle=pool_recycle,
+                pool_pre_ping=True,
+                connect_args=connect_args,
+            )
+        return engines[key]
+
+
+def engine_from_env(**kwargs) -> Engine:
+    return get_engine(
+        os.getenv("DB_DRIVER"),
+        os.getenv("DB_USER"),
+        os.getenv("DB_PASS"),
+        os.getenv("DB_HOST"),
+        os.getenv("DB_PORT"),
+        os.getenv("DB_NAME"),
+        **kwargs,
+    )
+
+
+def pool_status() -> dict:
+    return {str(engine.url): engine.pool.status() for engine in engines.values()}
+
+
+def report_pool():
+    pool_metrics.report(("pool_checkout",))
+    print(f"[db pool] {pool_status()}")
+
+
+def _after_fork_in_child():
+    # A forked child, e.g. a Celery worker, must not share the parent's
+    # sockets. Drop the inherited connections without closing them, which
+    # would end the parent's sessions, and let the child open its own.
+    global _lock
+    _lock = threading.Lock()
+    for engine in engines.values():
+        engine.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
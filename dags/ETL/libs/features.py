@@ -0,0 +1,155 @@
+import re
+
+FEATURE_FIELDS = (
+    'height',
+    'width',
+    'length',
+    'gross_weight',
+    'net_weight',
+    'screen_size',
+    'sim_slot',
+    'processor',
+    'memory',
+    'camera',
+    'battery',
+)
+
+
+def empty_features() -> dict:
+    return dict.fromkeys(FEATURE_FIELDS)
+
+
+def default_value(match):
+    return next((g for g in match.groups() if g), match.group())
+
+
+class FeatureRule:
+    # field is a feature name, or a tuple of names filled in order (the first
+    # match goes to the first one, the next to the second...). value turns the
+    # match into the stored value, or into a dict of several fields, and may
+    # return None to ignore the match. overwrite keeps the last match instead
+    # of the first. keywords are literals the rule is only tried on text
+    # holding one of, lower-case when the extractor ignores case.
+    def __init__(self, field, pattern: str, value=None, overwrite: bool = False, keywords: tuple = ()):
+        self.fields = field if isinstance(field, tuple) else (field,)
+        self.pattern = pattern
+        self.value = value or default_value
+        self.overwrite = overwrite
+        self.keywords = keywords
+
+
+class FeatureExtractor:
+    # Runs a shop's rule table over spec text. Patterns are compiled once per
+    # extractor. Each rule is one search that stops at the match it keeps, and
+    # its keywords are checked first with a plain substring test, so rules
+    # whose keywords are absent cost no regex scan at all. per_line runs the
+    # rules on each line holding a keyword instead of the whole text, for
+    # spec sheets with one spec per line.
+    def __init__(self, rules: list, flags: int = 0, per_line: bool = False):
+        self.rules = [rule if isinstance(rule, FeatureRule) else FeatureRule(*rule)
+                      for rule in rules]
+        self.patterns = [re.compile(rule.pattern, flags)
+                         for rule in self.rules]
+        self.ignore_case = bool(flags & re.IGNORECASE)
+        self.per_line = per_line
+
+    def _applies(self, rule: FeatureRule, haystack: str) -> bool:
+        for keyword in rule.keywords:
+            if keyword in haystack:
+                return True
+        return not rule.keywords
+
+    def _store(self, features: dict, fields: tuple, value, overwrite: bool):
+        if overwrite:
+            features[fields[0]] = value
+            return
+
+        for field in fields:
+            if features.get(field) is None:
+                features[field] = value
+                return
+
+    def _filled(self, features: dict, rule: FeatureRule) -> bool:
+        for field in rule.fields:
+            if features.get(field) is None:
+                return False
+        return True
+
+    def _apply(self, features: dict, rule: FeatureRule, pattern, text: str) -> bool:
+        # Stores the rule's matches in text, stopping once a rule that
+        # doesn't overwrite has all its fields. Per line only a line's first
+        # match counts, a multi-field rule fills its next field from the next
+        # line. Returns whether any match was stored.
+        stored = False
+        for match in pattern.finditer(text):
+            value = rule.value(match)
+            if value is None:
+                if self.per_line:
+                    break
+                continue
+
+            stored = True
+            if isinstance(value, dict):
+                for field, v in value.items():
+                    self._store(features, (field,), v, rule.overwrite)
+            elif len(rule.fields) == 1 and not rule.overwrite:
+                # The common case, the first match of one field.
+                if features.get(rule.fields[0]) is None:
+                    features[rule.fields[0]] = value
+                break
+            else:
+                self._store(features, rule.fields, value, rule.overwrite)
+
+            if self.per_line or (not rule.overwrite and self._filled(features, rule)):
+                break
+        return stored
+
+    def _lines(self, rule: FeatureRule, text: str, haystack: str) -> list:
+        # The lines holding one of the rule's keywords, in order, found with
+        # str.find rather than by testing every line.
+        if not rule.keywords or len(haystack) != len(text):
+            return [line for line, haystack_line in zip(text.split("\n"), haystack.split("\n"))
+                    if self._applies(rule, haystack_line)]
+
+        starts = set()
+        for keyword in rule.keywords:
+            pos = haystack.find(keyword)
+            while pos != -1:
+                starts.add(haystack.rfind("\n", 0, pos) + 1)
+                pos = haystack.find(keyword, pos + len(keyword))
+
+        lines = []
+        for start in sorted(starts):
+            end = text.find("\n", start)
+            lines.append(text[start:] if end == -1 else text[start:end])
+        return lines
+
+    def extract(self, text: str, features: dict = None) -> dict:
+        features = empty_features() if features is None else features
+        # Keywords are matched the way the patterns are.
+        haystack = text.lower() if self.ignore_case else text
+        for rule, pattern in zip(self.rules, self.patterns):
+            if not self._applies(rule, haystack):
+                continue
+
+            if not self.per_line:
+                self._apply(features, rule, pattern, text)
+                continue
+
+            # The last match wins when overwriting, so those rules read the
+            # lines from the end and stop at the first one matching.
+            lines = self._lines(rule, text, haystack)
+            for line in reversed(lines) if rule.overwrite else lines:
+                if self._apply(features, rule, pattern, line) and (
+                        rule.overwrite or self._filled(features, rule)):
+                    break
+
+        return features
+
+    def classify(self, text: str) -> str:
+        # Field of the highest priority rule matching anywhere in text.
+        haystack = text.lower() if self.ignore_case else text
+        for rule, pattern in zip(self.rules, self.patterns):
+            if self._applies(rule, haystack) and pattern.search(text) is not None:
+                return rule.fields[0]
+        return None
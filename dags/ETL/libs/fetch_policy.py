@@ -0,0 +1,146 @@
+import time
+import random
+import asyncio
+from ETL.libs.rate_limit import get_host
+
+
+class FetchDeferred(Exception):
+    # The URL was not attempted, its scrape status should stay as it is so
+    # the next run picks it up.
+    pass
+
+
+class CircuitOpen(FetchDeferred):
+    pass
+
+
+class BudgetExhausted(FetchDeferred):
+    pass
+
+
+class ContentMissing(Exception):
+    # The host answered, but the page lacks what the caller waited for, e.g.
+    # a selector. Retried, but never held against the host's circuit.
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 300):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = {}
+        self.opened_at = {}
+
+    def allow(self, host: str) -> bool:
+        opened_at = self.opened_at.get(host)
+        if opened_at is None:
+            return True
+
+        # Half open: requests go through again after the reset timeout, but
+        # a single failure re-opens the circuit.
+        if time.monotonic() - opened_at >= self.reset_timeout:
+            del self.opened_at[host]
+            self.failures[host] = self.failure_threshold - 1
+            return True
+        return False
+
+    def record_success(self, host: str):
+        self.failures.pop(host, None)
+
+    def record_failure(self, host: str) -> bool:
+        self.failures[host] = self.failures.get(host, 0) + 1
+        if self.failures[host] >= self.failure_threshold and host not in self.opened_at:
+            self.opened_at[host] = time.monotonic()
+            return True
+        return False
+
+    def open_hosts(self) -> list:
+        return list(self.opened_at)
+
+
+class FetchPolicy:
+    def __init__(self, max_attempts: int = 3, backoff_base: float = 1.0, backoff_max: float = 30,
+                 page_deadline: float = 120, run_budget: float = None, failure_threshold: int = 5,
+                 reset_timeout: float = 300, retry_on: tuple = (Exception,),
+                 breaker_ignore: tuple = (ContentMissing,), metrics=None):
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.page_deadline = page_deadline
+        self.run_budget = run_budget
+        self.retry_on = retry_on
+        self.breaker_ignore = breaker_ignore
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.metrics = metrics
+        self.run_started_at = time.monotonic()
+
+    def start_run(self):
+        self.run_started_at = time.monotonic()
+
+    def remaining_budget(self) -> float:
+        if self.run_budget is None:
+            return float("inf")
+        return self.run_budget - (time.monotonic() - self.run_started_at)
+
+    def backoff(self, attempt: int) -> float:
+        # Exponential backoff with full jitter.
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    def _incr(self, key: str):
+        if self.metrics is not None:
+            self.metrics.incr(key)
+
+    def _record_failure(self, host: str):
+        if self.breaker.record_failure(host):
+            self._incr("circuit_opened")
+            print(f"Opened circuit for {host} after repeated failures.")
+
+    async def call(self, url: str, fn, *args, **kwargs):
+        # The breaker counts one outcome per call, once the retries are
+        # spent, so it opens on failing URLs rather than failing attempts.
+        host = get_host(url)
+        deadline = time.monotonic() + self.page_deadline
+
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.remaining_budget() <= 0:
+                self._incr("budget_exhausted")
+                raise BudgetExhausted(f"Run budget spent before fetching {url}.")
+            if not self.breaker.allow(host):
+                self._incr("circuit_rejected")
+                raise CircuitOpen(f"Circuit for {host} is open, deferring {url}.")
+
+            timeout = min(deadline - time.monotonic(),
+                          self.remaining_budget())
+            try:
+                result = await asyncio.wait_for(fn(*args, **kwargs), timeout)
+
+            except FetchDeferred:
+                raise
+
+            except asyncio.TimeoutError:
+                if self.remaining_budget() <= 0:
+                    self._incr("budget_exhausted")
+                    raise BudgetExhausted(
+                        f"Run budget spent while fetching {url}.")
+
+                self._incr("deadline_exceeded")
+                self._record_failure(host)
+                raise
+
+            except self.retry_on as e:
+                delay = self.backoff(attempt)
+                if attempt >= self.max_attempts or time.monotonic() + delay >= deadline:
+                    if not isinstance(e, self.breaker_ignore):
+                        self._record_failure(host)
+                    raise
+
+                print(
+                    f"Attempt {attempt} for {url} failed ({e}), retrying in {delay:.1f}s.")
+                self._incr("retries")
+                await asyncio.sleep(delay)
+                continue
+
+            self.breaker.record_success(host)
+            return result
@@ -0,0 +1,17 @@
+import json
+import hashlib
+from bs4 import BeautifulSoup
+
+
+def fingerprint_soup(soup: BeautifulSoup, selectors: list) -> str:
+    digest = hashlib.sha256()
+    for selector in selectors:
+        digest.update(selector.encode("utf-8"))
+        for node in soup.select(selector):
+            digest.update(str(node).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def fingerprint_data(data) -> str:
+    content = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
@@ -0,0 +1,93 @@
+import time
+import asyncio
+import httpx
+from collections import defaultdict
+from ETL.libs.rate_limit import get_host
+
+MAX_CONNECTIONS = 200
+MAX_KEEPALIVE_CONNECTIONS = 50
+KEEPALIVE_EXPIRY = 30
+PER_HOST_CONNECTIONS = 16
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class RetryableStatus(Exception):
+    def __init__(self, response: httpx.Response):
+        super().__init__(f"{response.url} returned {response.status_code}")
+        self.response = response
+
+
+class AsyncHttpClient:
+    def __init__(self, headers: dict = None, timeout: float = 30, max_connections: int = MAX_CONNECTIONS,
+                 max_keepalive_connections: int = MAX_KEEPALIVE_CONNECTIONS,
+                 per_host_connections: int = PER_HOST_CONNECTIONS, throttle=None, metrics=None,
+                 policy=None):
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        )
+        self.per_host_connections = per_host_connections
+        self.throttle = throttle
+        self.metrics = metrics
+        self.policy = policy
+        self._client = None
+        self._host_limits = defaultdict(
+            lambda: asyncio.Semaphore(self.per_host_connections))
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created on first use so a closed client can be reopened, like the
+        # browser pool between refresh_links and run.
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                headers=self.headers,
+                timeout=self.timeout,
+                limits=self.limits,
+                follow_redirects=True,
+            )
+        return self._client
+
+    async def _send(self, method: str, url: str, **kwargs) -> httpx.Response:
+        if self.throttle is not None:
+            await self.throttle(url)
+
+        start = time.perf_counter()
+        async with self._host_limits[get_host(url)]:
+            # Streaming decodes gzip/br/zstd chunk by chunk as the body arrives.
+            async with self._get_client().stream(method, url, **kwargs) as response:
+                await response.aread()
+
+        if self.metrics is not None:
+            self.metrics.incr("http_requests")
+            self.metrics.incr("http_bytes", response.num_bytes_downloaded)
+            self.metrics.incr(f"http_{response.http_version}")
+            self.metrics.observe("http_request", time.perf_counter() - start)
+
+        if response.status_code in RETRY_STATUSES:
+            raise RetryableStatus(response)
+        return response
+
+    async def request(self, method: str, url: str, params: dict = None, data: dict = None,
+                      headers: dict = None) -> httpx.Response:
+        kwargs = {"params": params, "data": data, "headers": headers}
+        try:
+            # The fetch policy retries, enforces the deadline and trips the
+            # host's circuit breaker on transport errors and 429/5xx.
+            if self.policy is not None:
+                return await self.policy.call(url, self._send, method, url, **kwargs)
+            return await self._send(method, url, **kwargs)
+        except RetryableStatus as e:
+            return e.response
+
+    async def get(self, url: str, params: dict = None, headers: dict = None) -> httpx.Response:
+        return await self.request("GET", url, params=params, headers=headers)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._host_limits.clear()
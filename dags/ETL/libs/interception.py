@@ -0,0 +1,91 @@
+from ETL.libs.rate_limit import get_host
+
+BLOCKED_RESOURCE_TYPES = ("image", "media", "font")
+
+BLOCKED_DOMAINS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "facebook.net",
+    "facebook.com",
+    "connect.facebook.net",
+    "hotjar.com",
+    "clarity.ms",
+    "analytics.tiktok.com",
+    "tiktok.com",
+    "criteo.com",
+    "criteo.net",
+    "newrelic.com",
+    "nr-data.net",
+    "tawk.to",
+    "zendesk.com",
+    "livechatinc.com",
+    "klaviyo.com",
+    "youtube.com",
+)
+
+# Aborted requests never get a response, so the bytes they would have cost
+# are estimated from typical sizes on these shops.
+ESTIMATED_BYTES = {
+    "image": 60_000,
+    "media": 500_000,
+    "font": 40_000,
+    "script": 40_000,
+    "stylesheet": 20_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+}
+DEFAULT_ESTIMATED_BYTES = 10_000
+
+
+class PageTraffic:
+    def __init__(self):
+        self.blocked_requests = 0
+        self.allowed_requests = 0
+        self.bytes_loaded = 0
+        self.est_bytes_saved = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "blocked_requests": self.blocked_requests,
+            "allowed_requests": self.allowed_requests,
+            "kb_loaded": round(self.bytes_loaded / 1024, 1),
+            "est_kb_saved": round(self.est_bytes_saved / 1024, 1),
+        }
+
+
+class RequestBlocker:
+    def __init__(self, resource_types: tuple = BLOCKED_RESOURCE_TYPES, domains: tuple = BLOCKED_DOMAINS):
+        self.resource_types = set(resource_types)
+        self.domains = tuple(domains)
+
+    def is_blocked(self, resource_type: str, url: str) -> bool:
+        if resource_type in self.resource_types:
+            return True
+
+        host = get_host(url)
+        return any(host == d or host.endswith("." + d) for d in self.domains)
+
+    async def attach(self, page) -> PageTraffic:
+        traffic = PageTraffic()
+
+        async def handle_route(route):
+            request = route.request
+            if self.is_blocked(request.resource_type, request.url):
+                traffic.blocked_requests += 1
+                traffic.est_bytes_saved += ESTIMATED_BYTES.get(
+                    request.resource_type, DEFAULT_ESTIMATED_BYTES)
+                await route.abort()
+            else:
+                traffic.allowed_requests += 1
+                await route.continue_()
+
+        def on_response(response):
+            length = response.headers.get("content-length")
+            if length and length.isdigit():
+                traffic.bytes_loaded += int(length)
+
+        await page.route("**/*", handle_route)
+        page.on("response", on_response)
+        return traffic
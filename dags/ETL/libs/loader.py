@@ -0,0 +1,195 @@
+import io
+import re
+import math
+import time
+import threading
+import pandas as pd
+from sqlalchemy.engine import Engine
+from ETL.libs.migrations import list_migrations
+
+SCHEMA = "etl"
+
+FLUSH_ROWS = 5000
+FLUSH_INTERVAL = 10
+
+TABLE_RE = re.compile(
+    r'CREATE TABLE IF NOT EXISTS\s+([\w.]+)\s*\((.*?)\n\);', re.S | re.I)
+ADD_COLUMN_RE = re.compile(
+    r'ALTER TABLE\s+([\w.]+)\s+ADD COLUMN\s+(?:IF NOT EXISTS\s+)?([^;]*);', re.I)
+COLUMN_RE = re.compile(r'^\s*(\w+)\s+(\w+)(?:\s*\((\d+)(?:,\s*\d+)?\))?', re.I)
+CONSTRAINTS = ("PRIMARY", "FOREIGN", "UNIQUE", "CHECK", "CONSTRAINT")
+
+TEXT_TYPES = ("VARCHAR", "CHAR", "TEXT")
+INT_TYPES = ("INT", "INTEGER", "BIGINT", "SMALLINT", "SERIAL", "BIGSERIAL")
+
+tables = None
+
+
+class ValueTooLong(ValueError):
+    pass
+
+
+def parse_column(line: str):
+    column = COLUMN_RE.match(line)
+    if column is None or column.group(1).upper() in CONSTRAINTS:
+        return None
+    name, type_, length = column.groups()
+    return name, type_.upper(), int(length) if length else None
+
+
+def load_schema(sql: str, schema: dict = None) -> dict:
+    # Columns of every table the SQL creates or adds columns to, in
+    # declaration order, as (name, type, length) tuples.
+    schema = {} if schema is None else schema
+    for m in TABLE_RE.finditer(sql):
+        schema[m.group(1)] = [column for column in map(parse_column, m.group(2).splitlines())
+                              if column is not None]
+
+    for m in ADD_COLUMN_RE.finditer(sql):
+        column = parse_column(m.group(2))
+        columns = schema.setdefault(m.group(1), [])
+        if column is not None and column[0] not in {c[0] for c in columns}:
+            columns.append(column)
+    return schema
+
+
+def table_columns(table: str) -> list:
+    # The schema is the one the migrations build, applied in order.
+    global tables
+    if tables is None:
+        tables = {}
+        for migration in list_migrations():
+            load_schema(migration.sql, tables)
+
+    name = table if "." in table else f"{SCHEMA}.{table}"
+    if name not in tables:
+        raise ValueError(f"Table {table} is not declared in the migrations.")
+    return name, tables[name]
+
+
+def encode(value, type_: str, length: int) -> str:
+    # One CSV field. An empty unquoted field is NULL for COPY, strings are
+    # always quoted so an empty string stays one.
+    if value is None or (isinstance(value, float) and math.isnan(value)) or value is pd.NaT:
+        return ""
+
+    if type_ in TEXT_TYPES:
+        value = str(value)
+        # Never cut, a cut url no longer matches its unique index or joins.
+        if length is not None and len(value) > length:
+            raise ValueTooLong(
+                f"{value[:40]!r}... is {len(value)} characters, over {type_}({length}).")
+        return '"' + value.replace('"', '""') + '"'
+
+    if type_ in INT_TYPES:
+        return str(int(value))
+
+    value = str(value)
+    return '"' + value.replace('"', '""') + '"' if "," in value or '"' in value else value
+
+
+class CopyLoader:
+    # Buffers rows for one table and writes them with COPY FROM STDIN, in
+    # the column order and types the migrations declare. Rows are flushed
+    # once flush_rows are buffered or the oldest is flush_interval seconds
+    # old, and on close.
+    def __init__(self, db_conn: Engine, table: str, flush_rows: int = FLUSH_ROWS,
+                 flush_interval: float = FLUSH_INTERVAL, metrics=None):
+        self.db_conn = db_conn
+        self.table, self.columns = table_columns(table)
+        self.known = {name for name, _, _ in self.columns}
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.metrics = metrics
+        self.rows = []
+        self.skipped = []
+        self.first_row_at = None
+        self._lock = threading.Lock()
+
+    def add(self, data) -> int:
+        # data is a DataFrame or a list of row dicts. Returns the number of
+        # rows flushed, if this add triggered a flush.
+        rows = data.to_dict("records") if isinstance(
+            data, pd.DataFrame) else data
+        if not rows:
+            return 0
+
+        unknown = set().union(*rows) - self.known
+        if unknown:
+            raise ValueError(
+                f"Columns {sorted(unknown)} are not in {self.table}.")
+
+        with self._lock:
+            self.rows.extend(rows)
+            if self.first_row_at is None:
+                self.first_row_at = time.monotonic()
+            if len(self.rows) >= self.flush_rows or time.monotonic() - self.first_row_at >= self.flush_interval:
+                return self._flush()
+        return 0
+
+    def flush(self) -> int:
+        with self._lock:
+            return self._flush()
+
+    def _flush(self) -> int:
+        if not self.rows:
+            return 0
+
+        rows, self.rows, self.first_row_at = self.rows, [], None
+        # Only the columns the rows have, the rest keep their defaults.
+        present = set().union(*rows)
+        columns = [c for c in self.columns if c[0] in present]
+
+        buffer = io.StringIO()
+        skipped = 0
+        for row in rows:
+            try:
+                line = ",".join(encode(row.get(name), type_, length)
+                                for name, type_, length in columns)
+            except ValueTooLong as e:
+                print(f"Skipped a row for {self.table}: {e}")
+                self.skipped.append(row)
+                skipped += 1
+                continue
+            buffer.write(line)
+            buffer.write("\n")
+        buffer.seek(0)
+        rows_loaded = len(rows) - skipped
+        if self.metrics is not None and skipped:
+            self.metrics.incr("copy_rows_skipped", skipped)
+        if not rows_loaded:
+            return 0
+
+        sql = (f"COPY {self.table} ({', '.join(name for name, _, _ in columns)}) "
+               f"FROM STDIN WITH (FORMAT csv)")
+        start = time.perf_counter()
+        raw = self.db_conn.raw_connection()
+        try:
+            cursor = raw.cursor()
+            cursor.copy_expert(sql, buffer)
+            cursor.close()
+            raw.commit()
+        except Exception as e:
+            raw.rollback()
+            print(f"Failed to copy {rows_loaded} rows to {self.table}: {e}")
+            raise e
+        finally:
+            raw.close()
+
+        latency = time.perf_counter() - start
+        if self.metrics is not None:
+            self.metrics.incr("copy_flushes")
+            self.metrics.incr("copy_rows", rows_loaded)
+            self.metrics.observe("copy_flush", latency)
+        print(
+            f"Successfully loaded {rows_loaded} records to {self.table} in {latency:.3f}s.")
+        return rows_loaded
+
+    def take_skipped(self) -> list:
+        # Rows flushes left out since the last call, see ValueTooLong.
+        with self._lock:
+            skipped, self.skipped = self.skipped, []
+        return skipped
+
+    def close(self) -> int:
+        return self.flush()
@@ -0,0 +1,87 @@
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float("inf"))
+
+
+class Histogram:
+    # Fixed buckets, so memory stays the same however many values go in.
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        # Upper bound of the bucket the q-th value falls in.
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if n and seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self) -> dict:
+        return {f"<={bound}": n for bound, n in zip(self.buckets, self.counts) if n}
+
+
+class Metrics:
+    def __init__(self, name: str = "etl"):
+        self.name = name
+        self.started_at = time.perf_counter()
+        self.counters = defaultdict(int)
+        self.gauges = defaultdict(int)
+        self.peak_gauges = defaultdict(int)
+        self.timings = defaultdict(Histogram)
+
+    def incr(self, key: str, n: int = 1):
+        self.counters[key] += n
+
+    def gauge_add(self, key: str, delta: int):
+        self.gauges[key] += delta
+        self.peak_gauges[key] = max(self.peak_gauges[key], self.gauges[key])
+
+    def observe(self, key: str, seconds: float):
+        self.timings[key].observe(seconds)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def rate(self, key: str) -> float:
+        elapsed = self.elapsed()
+        return self.counters[key] / elapsed if elapsed else 0.0
+
+    def summary(self) -> dict:
+        timings = {
+            key: {
+                "count": histogram.count,
+                "avg": round(histogram.total / histogram.count, 4),
+                "p50": round(histogram.quantile(0.5), 4),
+                "p95": round(histogram.quantile(0.95), 4),
+                "max": round(histogram.max, 4),
+            }
+            for key, histogram in self.timings.items() if histogram.count
+        }
+        return {
+            "elapsed": round(self.elapsed(), 2),
+            "counters": dict(self.counters),
+            "gauges": dict(self.gauges),
+            "peak_gauges": dict(self.peak_gauges),
+            "timings": timings,
+        }
+
+    def report(self, histograms: tuple = ()):
+        print(f"[{self.name}] {self.summary()}")
+        for key in histograms:
+            if self.timings[key].count:
+                print(f"[{self.name}] {key} latency: {self.timings[key].as_dict()}")
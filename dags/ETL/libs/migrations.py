@@ -0,0 +1,132 @@
+import os
+import re
+import hashlib
+import argparse
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "sql", "migrations")
+MIGRATION_RE = re.compile(r'^(\d{4})_(\w+)\.sql$')
+
+# Held for the whole run so two runners never apply the same migration.
+LOCK_ID = 4242001
+
+CREATE_MIGRATIONS_TABLE = """
+CREATE SCHEMA IF NOT EXISTS etl;
+CREATE TABLE IF NOT EXISTS etl.schema_migrations (
+    version INT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    checksum CHAR(64) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+class Migration:
+    def __init__(self, version: int, name: str, path: str):
+        self.version = version
+        self.name = name
+        self.path = path
+
+    @property
+    def sql(self) -> str:
+        with open(self.path, "r") as f:
+            return f.read()
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+
+
+def list_migrations(directory: str = MIGRATIONS_DIR) -> list:
+    migrations = []
+    for file_name in sorted(os.listdir(directory)):
+        m = MIGRATION_RE.match(file_name)
+        if m is not None:
+            migrations.append(Migration(int(m.group(1)), m.group(2),
+                                        os.path.join(directory, file_name)))
+
+    versions = [migration.version for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {directory}.")
+    return migrations
+
+
+def applied_migrations(conn) -> dict:
+    rows = conn.execute(
+        text("SELECT version, checksum FROM etl.schema_migrations"))
+    return {version: checksum.strip() for version, checksum in rows}
+
+
+def migrate(engine: Engine, target: int = None, directory: str = MIGRATIONS_DIR) -> list:
+    # Applies the pending migrations up to target, each in its own
+    # transaction together with its etl.schema_migrations row.
+    applied_now = []
+    with engine.connect() as conn:
+        with conn.begin():
+            conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": LOCK_ID})
+        try:
+            with conn.begin():
+                conn.exec_driver_sql(CREATE_MIGRATIONS_TABLE)
+            with conn.begin():
+                applied = applied_migrations(conn)
+
+            for migration in list_migrations(directory):
+                if target is not None and migration.version > target:
+                    break
+
+                if migration.version in applied:
+                    if applied[migration.version] != migration.checksum:
+                        print(
+                            f"Migration {migration.version} ({migration.name}) changed after it was applied.")
+                    continue
+
+                print(f"Applying migration {migration.version} ({migration.name})")
+                with conn.begin():
+                    # Index builds can outlast the engine's statement timeout.
+                    conn.exec_driver_sql("SET LOCAL statement_timeout = 0")
+                    conn.exec_driver_sql(
+                        migration.sql, execution_options={"no_parameters": True})
+                    conn.execute(
+                        text("INSERT INTO etl.schema_migrations (version, name, checksum) "
+                             "VALUES (:version, :name, :checksum)"),
+                        {"version": migration.version, "name": migration.name,
+                         "checksum": migration.checksum},
+                    )
+                applied_now.append(migration.version)
+
+        finally:
+            with conn.begin():
+                conn.execute(
+                    text("SELECT pg_advisory_unlock(:id)"), {"id": LOCK_ID})
+
+    print(f"Applied migrations: {applied_now or 'none, the schema is up to date'}")
+    return applied_now
+
+
+def pending_migrations(engine: Engine, directory: str = MIGRATIONS_DIR) -> list:
+    with engine.connect() as conn:
+        exists = conn.execute(
+            text("SELECT to_regclass('etl.schema_migrations')")).scalar()
+        applied = applied_migrations(conn) if exists else {}
+    return [migration for migration in list_migrations(directory)
+            if migration.version not in applied]
+
+
+if __name__ == "__main__":
+    from ETL.libs.db import engine_from_env
+
+    parser = argparse.ArgumentParser(
+        description="Apply the pending schema migrations.")
+    parser.add_argument("--target", type=int,
+                        help="Last migration version to apply.")
+    parser.add_argument("--pending", action="store_true",
+                        help="List the pending migrations and exit.")
+    args = parser.parse_args()
+
+    engine = engine_from_env()
+    if args.pending:
+        for migration in pending_migrations(engine):
+            print(f"{migration.version:04d} {migration.name}")
+    else:
+        migrate(engine, args.target)
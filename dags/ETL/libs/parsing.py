@@ -0,0 +1,123 @@
+import re
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+PARSERS = ("html.parser", "lxml")
+DEFAULT_PARSER = "html.parser"
+
+_warned = set()
+
+
+def resolve_parser(parser: str) -> str:
+    if parser not in PARSERS:
+        raise ValueError(
+            f"Parser {parser} is not supported. Use one of {PARSERS}.")
+
+    # lxml is optional, fall back so a missing wheel slows the run down
+    # instead of failing it.
+    if parser == "lxml" and not HAS_LXML:
+        if parser not in _warned:
+            print("lxml is not installed, parsing with html.parser instead.")
+            _warned.add(parser)
+        return DEFAULT_PARSER
+    return parser
+
+
+def make_soup(html, parser: str = DEFAULT_PARSER) -> BeautifulSoup:
+    return BeautifulSoup(html, resolve_parser(parser))
+
+
+SCRIPT_RE = re.compile(r'<script\b([^>]*)>.*?</script\s*>', re.S | re.I)
+META_RE = re.compile(r'<meta\b([^>]*)>', re.I)
+ATTR_RE = re.compile(
+    r'([^\s=/>"\']+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+)))?')
+CONTAINER_RE = re.compile(r'^(\w+)?(?:#([\w-]+))?(?:\.([\w-]+))?$')
+
+
+def _attrs(attr_text: str) -> dict:
+    return {m.group(1).lower(): m.group(2) or m.group(3) or m.group(4) or ""
+            for m in ATTR_RE.finditer(attr_text)}
+
+
+def _element_end(html: str, tag: str, pos: int) -> int:
+    depth = 1
+    tag_re = re.compile(r'<(/?)%s\b[^>]*?(/?)>' % re.escape(tag), re.I)
+    for m in tag_re.finditer(html, pos):
+        if m.group(1):
+            depth -= 1
+        elif not m.group(2):
+            depth += 1
+        if depth == 0:
+            return m.end()
+    return len(html)
+
+
+def _container_spans(html: str, spec: str) -> list:
+    match = CONTAINER_RE.match(spec)
+    if match is None:
+        raise ValueError(
+            f"Container {spec} is not supported, use tag, #id, .class or a combination.")
+    tag, element_id, cls = match.groups()
+
+    pattern = r'<(%s)\b' % (re.escape(tag) if tag else r'[a-zA-Z][\w-]*')
+    if element_id:
+        pattern += r'(?=[^>]*\bid\s*=\s*["\']?%s\b)' % re.escape(element_id)
+    if cls:
+        pattern += r'(?=[^>]*\bclass\s*=\s*["\'][^"\']*\b%s\b)' % re.escape(cls)
+    pattern += r'([^>]*)>'
+
+    spans = []
+    for m in re.finditer(pattern, html, re.I):
+        attrs = _attrs(m.group(2))
+        if element_id and attrs.get("id") != element_id:
+            continue
+        if cls and cls not in attrs.get("class", "").split():
+            continue
+        spans.append((m.start(), _element_end(html, m.group(1), m.end())))
+    return spans
+
+
+def extract_regions(html: str, regions: dict) -> str:
+    # Cuts the declared regions out of the page with a regex pre-scan so only
+    # they go through the tree builder. Supported keys:
+    #   script_types     <script type="..."> values, e.g. application/ld+json
+    #   script_attrs     attributes a <script> carries, e.g. data-product-json
+    #   meta_properties  prefixes of <meta property/name>, e.g. og:
+    #   containers       whole elements by tag, #id, .class or tag.class
+    containers = []
+    for spec in regions.get("containers", []):
+        containers.extend(_container_spans(html, spec))
+
+    pieces = []
+    for start, end in sorted(containers):
+        if pieces and start < pieces[-1][1]:
+            continue
+        pieces.append((start, end))
+
+    def inside_container(start: int) -> bool:
+        return any(s <= start < e for s, e in pieces)
+
+    blobs = []
+    script_types = set(regions.get("script_types", []))
+    script_attrs = set(regions.get("script_attrs", []))
+    if script_types or script_attrs:
+        for m in SCRIPT_RE.finditer(html):
+            attrs = _attrs(m.group(1))
+            if attrs.get("type") in script_types or script_attrs & attrs.keys():
+                blobs.append(m.span())
+
+    prefixes = tuple(regions.get("meta_properties", []))
+    if prefixes:
+        for m in META_RE.finditer(html):
+            attrs = _attrs(m.group(1))
+            if (attrs.get("property") or attrs.get("name") or "").startswith(prefixes):
+                blobs.append(m.span())
+
+    pieces.extend(span for span in blobs if not inside_container(span[0]))
+    body = "\n".join(html[start:end] for start, end in sorted(pieces))
+    return f"<html><body>{body}</body></html>"
@@ -0,0 +1,125 @@
+import time
+import asyncio
+
+QUEUE_SIZE = 32
+
+# Put in a batch stage's queue to hand over the partial batch right away.
+FLUSH = object()
+
+
+class Stage:
+    # A pool of workers taking items off a bounded queue. Putting into a full
+    # queue waits, so a slow stage holds back the ones feeding it instead of
+    # letting items pile up in memory.
+    def __init__(self, name: str, handler, workers: int = 1, queue_size: int = QUEUE_SIZE, metrics=None):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.metrics = metrics
+        self.tasks = []
+
+    async def put(self, item):
+        await self.queue.put(item)
+        self.metrics.gauge_add(f"{self.name}_queue", 1)
+
+    async def _get(self):
+        item = await self.queue.get()
+        self.metrics.gauge_add(f"{self.name}_queue", -1)
+        return item
+
+    async def _handle(self, item):
+        start = time.perf_counter()
+        try:
+            await self.handler(item)
+        except Exception as e:
+            # Handlers deal with their own failures, this keeps the worker
+            # alive if one slips through.
+            print(f"Error in the {self.name} stage: {e!r}")
+            self.metrics.incr(f"{self.name}_errors")
+        finally:
+            self.metrics.observe(
+                f"{self.name}_stage", time.perf_counter() - start)
+
+    async def _work(self):
+        while True:
+            item = await self._get()
+            try:
+                await self._handle(item)
+            finally:
+                self.queue.task_done()
+
+    def start(self):
+        self.tasks = [asyncio.create_task(self._work())
+                      for _ in range(self.workers)]
+
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+    async def drain(self):
+        await self.queue.join()
+
+    def cancel(self):
+        for task in self.tasks:
+            task.cancel()
+
+
+class BatchStage(Stage):
+    # Hands its handler lists of items once they add up to batch_size, each
+    # item counting as size(item) or 1. A partial batch is handed over once
+    # its first item is flush_interval seconds old, or on drain.
+    def __init__(self, name: str, handler, batch_size: int, flush_interval: float,
+                 queue_size: int = QUEUE_SIZE, metrics=None, size=None):
+        super().__init__(name, handler, 1, queue_size, metrics)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.size = size or (lambda item: 1)
+
+    async def _flush(self, batch: list, done: int):
+        try:
+            if batch:
+                self.metrics.incr(f"{self.name}_flushes")
+                self.metrics.incr(f"{self.name}_items", len(batch))
+                await self._handle(batch)
+        finally:
+            # Items count as done only once their batch is handled, so drain
+            # waits for the last flush.
+            for _ in range(done):
+                self.queue.task_done()
+
+    async def _work(self):
+        batch = []
+        batch_size = 0
+        done = 0
+        deadline = None
+        getter = None
+        try:
+            while True:
+                # The pending get survives a timeout, so no item is lost
+                # when the flush interval runs out first.
+                if getter is None:
+                    getter = asyncio.ensure_future(self._get())
+                timeout = None if deadline is None else max(
+                    0, deadline - time.monotonic())
+                finished, _ = await asyncio.wait({getter}, timeout=timeout)
+
+                if finished:
+                    item, getter = getter.result(), None
+                    done += 1
+                    if item is not FLUSH:
+                        batch.append(item)
+                        batch_size += self.size(item)
+                        if deadline is None:
+                            deadline = time.monotonic() + self.flush_interval
+                        if batch_size < self.batch_size:
+                            continue
+
+                await self._flush(batch, done)
+                batch, batch_size, done, deadline = [], 0, 0, None
+        finally:
+            if getter is not None:
+                getter.cancel()
+
+    async def drain(self):
+        await self.put(FLUSH)
+        await self.queue.join()
@@ -0,0 +1,57 @@
+import time
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from ETL.libs.utils import get_sql_from_file
+
+# Upserts from etl.stg_products, in order, each keyed on its table's
+# natural key and only touching rows whose values changed.
+UPSERTS = (
+    ("products", "upsert_products.sql"),
+    ("product_feature", "upsert_product_features.sql"),
+)
+
+
+def promote(engine: Engine) -> dict:
+    # Moves the staged products into the core tables in one transaction and
+    # returns the inserted, updated and unchanged counts per table.
+    counts = {}
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        for table, file_name in UPSERTS:
+            staged, inserted, updated = conn.execute(
+                text(get_sql_from_file(file_name))).one()
+            counts[table] = {
+                "inserted": inserted,
+                "updated": updated,
+                "unchanged": staged - inserted - updated,
+            }
+
+        # Price history only grows when a price moves: the current row of a
+        # changed price is closed, then every key without a current row gets
+        # one.
+        conn.execute(text(get_sql_from_file("stage_product_prices.sql")))
+        staged = conn.execute(
+            text("SELECT COUNT(*) FROM staged_prices")).scalar()
+        changed = conn.execute(
+            text(get_sql_from_file("close_changed_prices.sql"))).rowcount
+        # A product now priced per variant loses its price without one.
+        conn.execute(text(get_sql_from_file("close_replaced_prices.sql")))
+        inserted = conn.execute(
+            text(get_sql_from_file("insert_changed_prices.sql"))).rowcount
+        counts["product_prices"] = {
+            "inserted": inserted - changed,
+            "updated": changed,
+            "unchanged": staged - inserted,
+        }
+
+    print(
+        f"Promoted staged products in {time.perf_counter() - start:.2f}s: {counts}")
+    return counts
+
+
+def current_prices(engine: Engine, product_ids: list) -> list:
+    # Served by the partial index over the current rows.
+    with engine.connect() as conn:
+        rows = conn.execute(text(get_sql_from_file("select_current_prices.sql")),
+                            {"product_ids": [int(i) for i in product_ids]})
+        return [dict(row._mapping) for row in rows]
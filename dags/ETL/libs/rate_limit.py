@@ -0,0 +1,77 @@
+import time
+import asyncio
+import threading
+from collections import defaultdict
+from urllib.parse import urlparse
+
+
+def get_host(url: str) -> str:
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        # Takes a token now and returns how long the caller has to wait before
+        # using it. Tokens may go negative, which queues later callers behind.
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens +
+                              (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class HostScheduler:
+    def __init__(self, default_rate: float = 1.0, default_burst: int = 1, global_rate: float = None,
+                 global_burst: int = None):
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self.buckets = {}
+        self.global_bucket = None
+        if global_rate:
+            self.global_bucket = TokenBucket(
+                global_rate, global_burst or int(global_rate) or 1)
+
+        self.requests = defaultdict(int)
+        self.wait_time = defaultdict(float)
+
+    def _reserve(self, url: str, rate: float = None, burst: int = None):
+        host = get_host(url)
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(
+                rate or self.default_rate, burst or self.default_burst)
+
+        delay = self.buckets[host].reserve()
+        if self.global_bucket is not None:
+            delay = max(delay, self.global_bucket.reserve())
+
+        self.requests[host] += 1
+        self.wait_time[host] += delay
+        return delay
+
+    async def acquire(self, url: str, rate: float = None, burst: int = None) -> float:
+        delay = self._reserve(url, rate, burst)
+        if delay:
+            await asyncio.sleep(delay)
+        return delay
+
+    def stats(self) -> dict:
+        return {
+            host: {
+                "requests": self.requests[host],
+                "wait_time": round(self.wait_time[host], 2),
+            }
+            for host in self.requests
+        }
@@ -0,0 +1,9 @@
+UPDATE etl.product_prices pp
+SET valid_to = CURRENT_TIMESTAMP,
+    is_current = FALSE
+FROM staged_prices st
+WHERE pp.product_id = st.product_id
+    AND pp.variant = st.variant
+    AND pp.is_current
+    AND (pp.price, pp.discounted_price, pp.discount_percentage)
+        IS DISTINCT FROM (st.price, st.discounted_price, st.discount_percentage);
@@ -0,0 +1,11 @@
+UPDATE etl.product_prices pp
+SET valid_to = CURRENT_TIMESTAMP,
+    is_current = FALSE
+WHERE pp.variant = ''
+    AND pp.is_current
+    AND EXISTS (
+        SELECT 1
+        FROM staged_prices st
+        WHERE st.product_id = pp.product_id
+            AND st.variant <> ''
+    );
@@ -0,0 +1,73 @@
+-- Rows from before prices were kept per variant have variant '' and one
+-- row per variant of every scrape run, all with the run's inserted_date.
+-- Each run keeps its lowest price, or the variants' prices would
+-- alternate into changes.
+DELETE FROM etl.product_prices pp
+USING (
+    SELECT
+        id,
+        ROW_NUMBER() OVER (
+            PARTITION BY product_id, inserted_date
+            ORDER BY price, discounted_price, discount_percentage, id
+        ) AS n
+    FROM etl.product_prices
+    WHERE variant = '' AND is_current IS NULL
+) legacy
+WHERE legacy.id = pp.id
+    AND legacy.n > 1;
+
+-- Keeps the first row of every run of identical prices per product and
+-- variant, valid until the next change. The last change is current.
+CREATE TEMPORARY TABLE price_changes ON COMMIT DROP AS
+SELECT
+    id,
+    inserted_date AS valid_from,
+    LEAD(inserted_date) OVER (
+        PARTITION BY product_id, variant ORDER BY inserted_date, id
+    ) AS valid_to
+FROM (
+    SELECT
+        id,
+        product_id,
+        variant,
+        inserted_date,
+        LAG(id) OVER w IS NULL
+            OR (price, discounted_price, discount_percentage) IS DISTINCT FROM (
+                LAG(price) OVER w, LAG(discounted_price) OVER w, LAG(discount_percentage) OVER w
+            ) AS changed
+    FROM etl.product_prices
+    WINDOW w AS (PARTITION BY product_id, variant ORDER BY inserted_date, id)
+) runs
+WHERE changed;
+
+DELETE FROM etl.product_prices pp
+WHERE NOT EXISTS (
+    SELECT 1 FROM price_changes c WHERE c.id = pp.id
+);
+
+-- Cleared first so no product briefly has two current rows.
+UPDATE etl.product_prices
+SET is_current = FALSE
+WHERE is_current IS DISTINCT FROM FALSE;
+
+UPDATE etl.product_prices pp
+SET valid_from = c.valid_from,
+    valid_to = c.valid_to,
+    is_current = c.valid_to IS NULL
+FROM price_changes c
+WHERE c.id = pp.id;
+
+-- A product priced per variant has no current price without one, its ''
+-- row ends where its current variant rows start.
+UPDATE etl.product_prices pp
+SET valid_to = GREATEST(pp.valid_from, v.valid_from),
+    is_current = FALSE
+FROM (
+    SELECT product_id, MIN(valid_from) AS valid_from
+    FROM etl.product_prices
+    WHERE variant <> '' AND is_current
+    GROUP BY product_id
+) v
+WHERE pp.product_id = v.product_id
+    AND pp.variant = ''
+    AND pp.is_current;
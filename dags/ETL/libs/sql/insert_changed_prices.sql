@@ -0,0 +1,27 @@
+INSERT INTO etl.product_prices (
+    product_id,
+    shop_id,
+    variant,
+    price,
+    discounted_price,
+    discount_percentage,
+    valid_from,
+    is_current
+)
+SELECT
+    st.product_id,
+    st.shop_id,
+    st.variant,
+    st.price,
+    st.discounted_price,
+    st.discount_percentage,
+    CURRENT_TIMESTAMP,
+    TRUE
+FROM staged_prices st
+WHERE NOT EXISTS (
+    SELECT 1
+    FROM etl.product_prices pp
+    WHERE pp.product_id = st.product_id
+        AND pp.variant = st.variant
+        AND pp.is_current
+);
@@ -8,6 +8,6 @@ SELECT DISTINCT
     a.url,
     a.updated_date
 FROM etl.stg_urls a
-JOIN etl.shops s ON s.name = a.shop
-LEFT JOIN etl.urls b ON b.url = a.url
+JOIN etl.stg_shops s ON s.name = a.shop
+LEFT JOIN etl.urls b ON b.shop_id = s.id AND b.url = a.url
 WHERE b.id IS NULL;
\ No newline at end of file
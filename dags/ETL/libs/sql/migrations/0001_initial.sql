@@ -6,27 +6,37 @@ CREATE TABLE IF NOT EXISTS etl.stg_shops (
     base_url VARCHAR(100)
 );
 
+-- Databases set up by the old init DAG already have the shops.
 INSERT INTO etl.stg_shops (name, base_url)
-VALUES 
-    ('Ansons','https://ansons.ph/'),
-    ('Abenson','https://www.abenson.com/l'),
-    ('SavenEarn','https://savenearn.com.ph/'),
-    ('CompAsia','https://compasia.com.ph/'),
-    ('VivoGlobal','https://shop.vivoglobal.ph/'),
-    ('Western','https://western.com.ph/shop/gadgets/smartphones/'),
-    ('KimStore','https://www.kimstore.com/collections/smartphones'),
-    ('PCX','https://pcx.com.ph/collections/smartphones'),
-    ('MyPhone','https://www.myphone.com.ph/smartphone/'),
-    ('Emcor','https://emcor.com.ph/product-category/it-products/smartphone/'),
-    ('MxMemoXpress','https://mxmemoxpress.com/all-mobiles/');
+SELECT v.name, v.base_url
+FROM (
+    VALUES
+        ('Ansons','https://ansons.ph/'),
+        ('Abenson','https://www.abenson.com/l'),
+        ('SavenEarn','https://savenearn.com.ph/'),
+        ('CompAsia','https://compasia.com.ph/'),
+        ('VivoGlobal','https://shop.vivoglobal.ph/'),
+        ('Western','https://western.com.ph/shop/gadgets/smartphones/'),
+        ('KimStore','https://www.kimstore.com/collections/smartphones'),
+        ('PCX','https://pcx.com.ph/collections/smartphones'),
+        ('MyPhone','https://www.myphone.com.ph/smartphone/'),
+        ('Emcor','https://emcor.com.ph/product-category/it-products/smartphone/'),
+        ('MxMemoXpress','https://mxmemoxpress.com/all-mobiles/')
+) AS v(name, base_url)
+WHERE NOT EXISTS (
+    SELECT 1 FROM etl.stg_shops s WHERE s.name = v.name
+);
 
 CREATE TABLE IF NOT EXISTS etl.stg_urls (
     inserted_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    shop_id INT REFERENCES etl.stg_shops(id),
+    shop VARCHAR(50),
     url VARCHAR(255),
     updated_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Older databases have shop_id in the staging table.
+ALTER TABLE etl.stg_urls ADD COLUMN IF NOT EXISTS shop VARCHAR(50);
+
 CREATE TABLE IF NOT EXISTS etl.urls (
     id SERIAL PRIMARY KEY,
     inserted_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -101,3 +111,9 @@ CREATE TABLE IF NOT EXISTS etl.product_prices (
     discounted_price DECIMAL(10, 2),
     discount_percentage DECIMAL(10, 2)
 );
+
+CREATE TABLE IF NOT EXISTS etl.url_fingerprints (
+    url_id INT PRIMARY KEY REFERENCES etl.urls(id),
+    fingerprint CHAR(64) NOT NULL,
+    updated_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,58 @@
+-- Unique keys the staging-to-core anti-joins look rows up by, and a
+-- partial index over the URLs still to scrape. Duplicates would block the
+-- unique indexes, so the oldest row of each key is kept and the rows
+-- pointing at the others are moved over to it first.
+
+CREATE TEMPORARY TABLE url_duplicates ON COMMIT DROP AS
+SELECT id, keep_id
+FROM (
+    SELECT id, MIN(id) OVER (PARTITION BY shop_id, url) AS keep_id
+    FROM etl.urls
+) u
+WHERE id <> keep_id;
+
+DELETE FROM etl.url_fingerprints f
+USING url_duplicates d
+WHERE f.url_id = d.id;
+
+DELETE FROM etl.urls u
+USING url_duplicates d
+WHERE u.id = d.id;
+
+CREATE TEMPORARY TABLE product_duplicates ON COMMIT DROP AS
+SELECT id, keep_id
+FROM (
+    SELECT id, MIN(id) OVER (PARTITION BY shop_id, url) AS keep_id
+    FROM etl.products
+) p
+WHERE id <> keep_id;
+
+UPDATE etl.product_feature f
+SET product_id = d.keep_id
+FROM product_duplicates d
+WHERE f.product_id = d.id;
+
+UPDATE etl.product_prices pp
+SET product_id = d.keep_id
+FROM product_duplicates d
+WHERE pp.product_id = d.id;
+
+DELETE FROM etl.products p
+USING product_duplicates d
+WHERE p.id = d.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS urls_shop_id_url_key
+    ON etl.urls (shop_id, url);
+
+CREATE INDEX IF NOT EXISTS urls_unscraped_idx
+    ON etl.urls (shop_id)
+    WHERE scrape_status <> 'DONE';
+
+CREATE UNIQUE INDEX IF NOT EXISTS products_shop_id_url_key
+    ON etl.products (shop_id, url);
+
+CREATE INDEX IF NOT EXISTS product_feature_product_id_idx
+    ON etl.product_feature (product_id);
+
+CREATE INDEX IF NOT EXISTS product_prices_product_id_idx
+    ON etl.product_prices (product_id);
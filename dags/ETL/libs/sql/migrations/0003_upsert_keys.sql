@@ -0,0 +1,13 @@
+-- Features are upserted per product from now on, keep the latest row of
+-- each product so product_id can be unique.
+DELETE FROM etl.product_feature f
+USING etl.product_feature newer
+WHERE newer.product_id = f.product_id AND newer.id > f.id;
+
+DROP INDEX IF EXISTS etl.product_feature_product_id_idx;
+
+CREATE UNIQUE INDEX IF NOT EXISTS product_feature_product_id_key
+    ON etl.product_feature (product_id);
+
+ALTER TABLE etl.products ADD COLUMN IF NOT EXISTS updated_date TIMESTAMP;
+ALTER TABLE etl.product_feature ADD COLUMN IF NOT EXISTS updated_date TIMESTAMP;
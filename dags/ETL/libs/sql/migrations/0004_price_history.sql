@@ -0,0 +1,27 @@
+-- Prices become validity intervals per product and variant. A row is only
+-- written when the price changes, and the current one has is_current set.
+ALTER TABLE etl.product_prices ADD COLUMN IF NOT EXISTS variant VARCHAR(255) NOT NULL DEFAULT '';
+ALTER TABLE etl.product_prices ADD COLUMN IF NOT EXISTS valid_from TIMESTAMP;
+ALTER TABLE etl.product_prices ADD COLUMN IF NOT EXISTS valid_to TIMESTAMP;
+ALTER TABLE etl.product_prices ADD COLUMN IF NOT EXISTS is_current BOOLEAN;
+
+-- Rows from before this migration keep is_current NULL until
+-- ETL.maintenance.compact_prices turns them into intervals.
+ALTER TABLE etl.product_prices ALTER COLUMN valid_from SET DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE etl.product_prices ALTER COLUMN is_current SET DEFAULT TRUE;
+
+CREATE UNIQUE INDEX IF NOT EXISTS product_prices_current_key
+    ON etl.product_prices (product_id, variant)
+    WHERE is_current;
+
+CREATE OR REPLACE VIEW etl.current_product_prices AS
+SELECT
+    product_id,
+    shop_id,
+    variant,
+    price,
+    discounted_price,
+    discount_percentage,
+    valid_from
+FROM etl.product_prices
+WHERE is_current;
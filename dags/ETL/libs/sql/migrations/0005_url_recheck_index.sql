@@ -0,0 +1,4 @@
+-- DONE URLs are scraped again once their updated_date is older than the
+-- recheck interval, see select_urls_to_recheck.sql.
+CREATE INDEX IF NOT EXISTS urls_shop_id_updated_date_idx
+    ON etl.urls (shop_id, updated_date);
@@ -0,0 +1,9 @@
+SELECT
+    product_id,
+    variant,
+    price,
+    discounted_price,
+    discount_percentage,
+    valid_from
+FROM etl.current_product_prices
+WHERE product_id = ANY(:product_ids);
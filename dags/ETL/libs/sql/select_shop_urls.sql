@@ -0,0 +1,4 @@
+SELECT u.id, u.url
+FROM etl.urls u
+JOIN etl.stg_shops s ON s.id = u.shop_id
+WHERE s.name='{shop}';
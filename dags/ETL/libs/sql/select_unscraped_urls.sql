@@ -1 +1,4 @@
-SELECT DISTINCT id, url FROM etl.urls WHERE scrape_status<>'DONE' AND shop='{shop}';
\ No newline at end of file
+SELECT u.id, u.url
+FROM etl.urls u
+JOIN etl.stg_shops s ON s.id = u.shop_id
+WHERE u.scrape_status<>'DONE' AND s.name='{shop}';
@@ -0,0 +1,5 @@
+SELECT f.url_id, f.fingerprint
+FROM etl.url_fingerprints f
+JOIN etl.urls u ON u.id = f.url_id
+JOIN etl.stg_shops s ON s.id = u.shop_id
+WHERE s.name='{shop}';
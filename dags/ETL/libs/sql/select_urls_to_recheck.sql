@@ -0,0 +1,14 @@
+-- Two branches so each can use its own index: the URLs still to scrape
+-- through urls_unscraped_idx, the stale DONE ones through
+-- urls_shop_id_updated_date_idx.
+SELECT u.id, u.url
+FROM etl.urls u
+JOIN etl.stg_shops s ON s.id = u.shop_id
+WHERE u.scrape_status<>'DONE' AND s.name='{shop}'
+UNION ALL
+SELECT u.id, u.url
+FROM etl.urls u
+JOIN etl.stg_shops s ON s.id = u.shop_id
+WHERE u.scrape_status='DONE' AND s.name='{shop}'
+    AND (u.updated_date IS NULL
+        OR u.updated_date < NOW() - INTERVAL '{recheck_after} hours');
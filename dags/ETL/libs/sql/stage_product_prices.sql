@@ -0,0 +1,12 @@
+CREATE TEMPORARY TABLE staged_prices ON COMMIT DROP AS
+SELECT DISTINCT ON (p.id, COALESCE(sp.variant, ''))
+    p.id AS product_id,
+    s.id AS shop_id,
+    COALESCE(sp.variant, '') AS variant,
+    sp.price,
+    sp.discounted_price,
+    sp.discount_percentage
+FROM etl.stg_products sp
+JOIN etl.stg_shops s ON s.name = sp.shop
+JOIN etl.products p ON p.shop_id = s.id AND p.url = sp.url
+ORDER BY p.id, COALESCE(sp.variant, ''), sp.inserted_date DESC;
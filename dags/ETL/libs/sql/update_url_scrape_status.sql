@@ -1,4 +0,0 @@
-UPDATE etl.urls 
-SET scrape_status='{status}'
-    ,updated_date='{timestamp}'
-WHERE id={pkey}
\ No newline at end of file
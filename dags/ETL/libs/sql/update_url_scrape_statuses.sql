@@ -0,0 +1,9 @@
+UPDATE etl.urls u
+SET scrape_status = s.status
+    ,updated_date = s.updated_date
+FROM unnest(
+    CAST(:ids AS INT[]),
+    CAST(:statuses AS VARCHAR[]),
+    CAST(:timestamps AS TIMESTAMP[])
+) AS s(id, status, updated_date)
+WHERE u.id = s.id;
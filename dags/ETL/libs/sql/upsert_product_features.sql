@@ -0,0 +1,73 @@
+WITH staged AS (
+    SELECT DISTINCT ON (p.id)
+        p.id AS product_id,
+        sp.height,
+        sp.width,
+        sp.length,
+        sp.gross_weight,
+        sp.net_weight,
+        sp.screen_size,
+        sp.sim_slot,
+        sp.processor,
+        sp.memory,
+        sp.camera,
+        sp.battery
+    FROM etl.stg_products sp
+    JOIN etl.stg_shops s ON s.name = sp.shop
+    JOIN etl.products p ON p.shop_id = s.id AND p.url = sp.url
+    ORDER BY p.id, sp.inserted_date DESC
+),
+upserted AS (
+    INSERT INTO etl.product_feature AS f (
+        product_id,
+        height,
+        width,
+        length,
+        gross_weight,
+        net_weight,
+        screen_size,
+        sim_slot,
+        processor,
+        memory,
+        camera,
+        battery
+    )
+    SELECT
+        product_id,
+        height,
+        width,
+        length,
+        gross_weight,
+        net_weight,
+        screen_size,
+        sim_slot,
+        processor,
+        memory,
+        camera,
+        battery
+    FROM staged
+    ON CONFLICT (product_id) DO UPDATE
+    SET height = EXCLUDED.height,
+        width = EXCLUDED.width,
+        length = EXCLUDED.length,
+        gross_weight = EXCLUDED.gross_weight,
+        net_weight = EXCLUDED.net_weight,
+        screen_size = EXCLUDED.screen_size,
+        sim_slot = EXCLUDED.sim_slot,
+        processor = EXCLUDED.processor,
+        memory = EXCLUDED.memory,
+        camera = EXCLUDED.camera,
+        battery = EXCLUDED.battery,
+        updated_date = CURRENT_TIMESTAMP
+    WHERE (f.height, f.width, f.length, f.gross_weight, f.net_weight, f.screen_size,
+           f.sim_slot, f.processor, f.memory, f.camera, f.battery)
+        IS DISTINCT FROM (EXCLUDED.height, EXCLUDED.width, EXCLUDED.length, EXCLUDED.gross_weight,
+                          EXCLUDED.net_weight, EXCLUDED.screen_size, EXCLUDED.sim_slot,
+                          EXCLUDED.processor, EXCLUDED.memory, EXCLUDED.camera, EXCLUDED.battery)
+    RETURNING (xmax = 0) AS inserted
+)
+SELECT
+    (SELECT COUNT(*) FROM staged) AS staged,
+    COUNT(*) FILTER (WHERE inserted) AS inserted,
+    COUNT(*) FILTER (WHERE NOT inserted) AS updated
+FROM upserted;
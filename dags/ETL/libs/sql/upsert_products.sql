@@ -0,0 +1,48 @@
+WITH staged AS (
+    SELECT DISTINCT ON (s.id, a.url)
+        s.id AS shop_id,
+        a.name,
+        a.brand,
+        a.rating,
+        a.description,
+        a.url,
+        a.image_url
+    FROM etl.stg_products a
+    JOIN etl.stg_shops s ON s.name = a.shop
+    ORDER BY s.id, a.url, a.inserted_date DESC
+),
+upserted AS (
+    INSERT INTO etl.products AS p (
+        shop_id,
+        name,
+        brand,
+        rating,
+        description,
+        url,
+        image_url
+    )
+    SELECT
+        shop_id,
+        name,
+        brand,
+        rating,
+        description,
+        url,
+        image_url
+    FROM staged
+    ON CONFLICT (shop_id, url) DO UPDATE
+    SET name = EXCLUDED.name,
+        brand = EXCLUDED.brand,
+        rating = EXCLUDED.rating,
+        description = EXCLUDED.description,
+        image_url = EXCLUDED.image_url,
+        updated_date = CURRENT_TIMESTAMP
+    WHERE (p.name, p.brand, p.rating, p.description, p.image_url)
+        IS DISTINCT FROM (EXCLUDED.name, EXCLUDED.brand, EXCLUDED.rating, EXCLUDED.description, EXCLUDED.image_url)
+    RETURNING (xmax = 0) AS inserted
+)
+SELECT
+    (SELECT COUNT(*) FROM staged) AS staged,
+    COUNT(*) FILTER (WHERE inserted) AS inserted,
+    COUNT(*) FILTER (WHERE NOT inserted) AS updated
+FROM upserted;
@@ -0,0 +1,9 @@
+INSERT INTO etl.url_fingerprints (
+    url_id,
+    fingerprint,
+    updated_date
+)
+VALUES (:url_id, :fingerprint, :updated_date)
+ON CONFLICT (url_id) DO UPDATE
+SET fingerprint = EXCLUDED.fingerprint,
+    updated_date = EXCLUDED.updated_date;
\ No newline at end of file
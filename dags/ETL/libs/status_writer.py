@@ -0,0 +1,68 @@
+import time
+import threading
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from ETL.libs.utils import get_sql_from_file
+
+FLUSH_SIZE = 500
+FLUSH_INTERVAL = 10
+
+
+class StatusWriter:
+    # Buffers (url id, status, timestamp) updates for etl.urls and applies
+    # them with one UPDATE per flush. Flushes once flush_size are buffered,
+    # once the oldest is flush_interval seconds old, and on close.
+    def __init__(self, db_conn: Engine, flush_size: int = FLUSH_SIZE, flush_interval: float = FLUSH_INTERVAL,
+                 metrics=None):
+        self.db_conn = db_conn
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.metrics = metrics
+        self.statuses = {}
+        self.first_status_at = None
+        self._lock = threading.Lock()
+
+    def add(self, pkey: int, status: str, timestamp: str) -> int:
+        with self._lock:
+            # A later update for the same URL replaces the buffered one.
+            self.statuses[int(pkey)] = (status, timestamp)
+            if self.first_status_at is None:
+                self.first_status_at = time.monotonic()
+            if (len(self.statuses) >= self.flush_size
+                    or time.monotonic() - self.first_status_at >= self.flush_interval):
+                return self._flush()
+        return 0
+
+    def add_many(self, statuses: list) -> int:
+        return sum(self.add(pkey, status, timestamp) for pkey, status, timestamp in statuses)
+
+    def flush(self) -> int:
+        with self._lock:
+            return self._flush()
+
+    def _flush(self) -> int:
+        if not self.statuses:
+            return 0
+
+        statuses, self.statuses, self.first_status_at = self.statuses, {}, None
+        params = {
+            "ids": list(statuses),
+            "statuses": [status for status, _ in statuses.values()],
+            "timestamps": [timestamp for _, timestamp in statuses.values()],
+        }
+
+        start = time.perf_counter()
+        with self.db_conn.begin() as conn:
+            conn.execute(text(get_sql_from_file(
+                "update_url_scrape_statuses.sql")), params)
+
+        latency = time.perf_counter() - start
+        if self.metrics is not None:
+            self.metrics.incr("status_flushes")
+            self.metrics.incr("status_rows", len(statuses))
+            self.metrics.observe("status_flush", latency)
+        print(f"Updated the scrape status of {len(statuses)} URLs in {latency:.3f}s.")
+        return len(statuses)
+
+    def close(self) -> int:
+        return self.flush()
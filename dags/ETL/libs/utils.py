@@ -1,21 +1,16 @@
 import os
-from sqlalchemy import create_engine, text
-from sqlalchemy.engine import URL, Engine
+from functools import lru_cache
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from ETL.libs.db import get_engine
 
 
 def get_db_conn(drivername: str, username: str, password: str, host: str, port: str, database: str) -> Engine:
-    connection_string = URL.create(
-        drivername=drivername,
-        username=username,
-        password=password,
-        host=host,
-        port=port,
-        database=database,
-    )
-    db_conn = create_engine(connection_string)
-    return db_conn
+    # The process-wide engine for this database, see ETL.libs.db.
+    return get_engine(drivername, username, password, host, port, database)
 
 
+@lru_cache(maxsize=None)
 def get_sql_from_file(file_name: str) -> str:
     base_dir = os.path.dirname(__file__)
     sql_path = os.path.join(base_dir, "sql", file_name)
@@ -23,19 +18,18 @@ def get_sql_from_file(file_name: str) -> str:
         return f.read()
 
 
-def execute_query(engine: Engine, sql: str) -> None:
+def execute_query(engine, sql: str, params=None) -> None:
+    # Pass a Connection to run inside the caller's transaction instead of
+    # opening one.
     print(f"Running query {sql}")
-    with engine.begin() as conn:
-        conn.execute(text(sql))
+    if isinstance(engine, Connection):
+        engine.execute(text(sql), params)
+    else:
+        with engine.begin() as conn:
+            conn.execute(text(sql), params)
     print("Query successfully executed.")
 
 
-def update_url_scrape_status(db_engine: Engine, pkey: int, status: str, timestamp: str):
-    sql = get_sql_from_file("update_url_scrape_status.sql")
-    sql = sql.format(status=status, timestamp=timestamp, pkey=pkey)
-    execute_query(db_engine, sql)
-
-
 def check_table_exists(table_name: str) -> bool:
     sql = f"""
     SELECT EXISTS (
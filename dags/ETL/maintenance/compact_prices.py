@@ -0,0 +1,49 @@
+# One-off conversion of etl.product_prices from a full copy per run to
+# change-only validity intervals, after migration 0004. Safe to run again.
+# Run from the dags folder:
+#   python -m ETL.maintenance.compact_prices [--dry-run]
+import argparse
+import time
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from ETL.libs.db import engine_from_env
+from ETL.libs.utils import get_sql_from_file
+
+COUNT_PRICES = "SELECT COUNT(*) FROM etl.product_prices"
+
+
+def compact_prices(engine: Engine, dry_run: bool = False) -> tuple:
+    start = time.perf_counter()
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            conn.exec_driver_sql("SET LOCAL statement_timeout = 0")
+            # Promotion must not write prices while the history is rebuilt.
+            conn.exec_driver_sql(
+                "LOCK TABLE etl.product_prices IN SHARE ROW EXCLUSIVE MODE")
+            before = conn.execute(text(COUNT_PRICES)).scalar()
+            conn.exec_driver_sql(get_sql_from_file("compact_product_prices.sql"),
+                                 execution_options={"no_parameters": True})
+            after = conn.execute(text(COUNT_PRICES)).scalar()
+
+            if dry_run:
+                transaction.rollback()
+            else:
+                transaction.commit()
+        except Exception:
+            transaction.rollback()
+            raise
+
+    print(f"{'Would compact' if dry_run else 'Compacted'} etl.product_prices from {before} to {after} rows "
+          f"in {time.perf_counter() - start:.1f}s.")
+    return before, after
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Turn the product price history into change-only validity intervals.")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Report the row counts and roll back.")
+    args = parser.parse_args()
+
+    compact_prices(engine_from_env(), args.dry_run)
@@ -1,3 +1,4 @@
+import re
 import asyncio
 import nest_asyncio
 import random
@@ -5,10 +6,22 @@ import time
 import pandas as pd
 from bs4 import BeautifulSoup
 from .products_etl import ProductsETL
-from playwright.async_api import async_playwright
+from ETL.libs.features import empty_features
 from fake_useragent import UserAgent
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 nest_asyncio.apply()
 
+GRID_ITEM_SELECTOR = 'div.item-siminia-product-grid-item-3do'
+COUNT_ITEMS_JS = f"() => document.querySelectorAll('{GRID_ITEM_SELECTOR}').length"
+NEW_ITEMS_JS = f"(previous) => document.querySelectorAll('{GRID_ITEM_SELECTOR}').length > previous"
+CATALOGUE_XHR = "graphql"
+
+NUMERIC_FEATURES = ('height', 'width', 'length', 'gross_weight', 'net_weight')
+
+SCROLL_MIN_TIMEOUT = 1.5
+SCROLL_MAX_TIMEOUT = 8
+SCROLL_MAX_IDLE_STEPS = 3
+
 headers = {
     "Accept": 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
     'Accept-Encoding': 'gzip, deflate, br, zstd',
@@ -28,87 +41,155 @@ headers = {
 
 
 class AbensonETL(ProductsETL):
-    def __init__(self, shop, url, extract_url_link):
-        super().__init__()
+    PRODUCT_SELECTORS = [
+        'h1.productFullDetail-productName-2jb',
+        'section.productFullDetail-shortDesc-1L9',
+    ]
+
+    FINGERPRINT_SELECTORS = [
+        'h1.productFullDetail-productName-2jb',
+        'section.productFullDetail-shortDesc-1L9',
+        'span.productFullDetail-specialPrice-1wb',
+        'span.productFullDetail-regularPrice-188',
+        'span.productFullDetail-saleOff-a4h',
+        'span.productReview-averageReview-qT6',
+        'meta[itemprop]',
+        'div.features-block-2mF',
+    ]
+
+    # Highlight and GraphQL attribute labels, matched in this order of
+    # priority.
+    FEATURE_FLAGS = re.IGNORECASE
+
+    FEATURE_RULES = [
+        ('height', r'height'),
+        ('width', r'width'),
+        ('length', r'length'),
+        ('gross_weight', r'gross weight'),
+        ('net_weight', r'net weight'),
+        ('screen_size', r'screen size'),
+        ('sim_slot', r'sim slot'),
+        ('processor', r'processor'),
+        ('memory', r'memory'),
+        ('camera', r'camera'),
+        ('battery', r'battery'),
+    ]
+
+    # The product page is rendered from Magento GraphQL responses, read those
+    # instead of waiting for the DOM to settle.
+    CAPTURE_URL_PATTERNS = [r'/graphql']
+    # Only the product detail queries, not the cart, menu or related
+    # product calls the page also makes.
+    CAPTURE_OPERATIONS = ['getProductDetailForProductPage', 'getProductDetail']
+
+    def __init__(self, shop, url, extract_url_link, **kwargs):
+        super().__init__(**kwargs)
         self.SHOP = shop
         self.URL = url
         self.EXTRACT_URL_LINK = extract_url_link
 
-    async def _scroll_products(self, url):
-        soup = None
-        browser = None
-        try:
-            async with async_playwright() as p:
-                browser_args = {
-                    "headless": True,
-                    "args": ["--disable-blink-features=AutomationControlled"]
-                }
-
-                browser = await p.chromium.launch(**browser_args)
-                context = await browser.new_context(
-                    user_agent=UserAgent().random,
-                    viewport={"width": random.randint(
-                        1200, 1600), "height": random.randint(800, 1200)},
-                    locale="en-US"
-                )
+    async def _load_all_products(self, page):
+        # Track the catalogue XHRs in flight so a slow response is waited on
+        # instead of being mistaken for the end of the list.
+        pending = set()
 
-                page = await context.new_page()
-                await page.set_extra_http_headers(headers)
+        def is_catalogue(request):
+            return request.resource_type in ("xhr", "fetch") and CATALOGUE_XHR in request.url
 
-                await page.goto(url, wait_until="domcontentloaded")
-                await page.wait_for_selector('#root-product-list', timeout=30000)
+        def on_request(request):
+            if is_catalogue(request):
+                pending.add(request)
+
+        def on_request_done(request):
+            pending.discard(request)
+
+        page.on("request", on_request)
+        page.on("requestfinished", on_request_done)
+        page.on("requestfailed", on_request_done)
+
+        previous_count = await page.evaluate(COUNT_ITEMS_JS)
+        timeout = SCROLL_MAX_TIMEOUT
+        latencies = []
+        idle_steps = 0
+
+        while True:
+            start = time.perf_counter()
+            await page.evaluate('window.scrollTo(0, document.body.scrollHeight)')
+
+            try:
+                await page.wait_for_function(
+                    NEW_ITEMS_JS, arg=previous_count, timeout=timeout * 1000)
+            except PlaywrightTimeoutError:
+                idle_steps += 1
+                if not pending or idle_steps >= SCROLL_MAX_IDLE_STEPS:
+                    print("No more items being loaded. Done scrolling.")
+                    break
 
                 print(
-                    "Starting to scrape the product list (Infinite scroll scrape)...")
+                    f"Waiting on {len(pending)} catalogue requests before giving up.")
+                try:
+                    await page.wait_for_event("requestfinished", timeout=SCROLL_MAX_TIMEOUT * 1000)
+                except PlaywrightTimeoutError:
+                    break
+                continue
 
-                scroll_step = 1500
-                scroll_delay = 5
+            idle_steps = 0
+            latency = time.perf_counter() - start
+            latencies.append(latency)
+            self.metrics.observe("scroll_step", latency)
 
-                previous_count = 0
-                same_count_retries = 0
-                max_retries = 3
+            previous_count = await page.evaluate(COUNT_ITEMS_JS)
+            print(
+                f"Current item count: {previous_count} (step {len(latencies)}, {latency:.2f}s)")
 
-                while True:
-                    # Scroll to the bottom
-                    await page.evaluate(f'window.scrollBy(0, {scroll_step})')
-                    await asyncio.sleep(scroll_delay)
+            # Give the next batch a few times the latency seen so far.
+            timeout = min(SCROLL_MAX_TIMEOUT, max(
+                SCROLL_MIN_TIMEOUT, 3 * max(latencies[-3:])))
 
-                    # Check if the spinner exists
-                    current_count = await page.evaluate("""
-                        () => document.querySelectorAll('div.item-siminia-product-grid-item-3do').length
-                    """)
+        if latencies:
+            print(
+                f"Loaded {previous_count} items in {len(latencies)} steps, "
+                f"{sum(latencies) / len(latencies):.2f}s average step latency.")
 
-                    print(f"Current item count: {current_count}")
+    async def _scroll_products(self, url):
+        if self.replay:
+            rendered_html = self.archive.get(url)
+            if rendered_html is None:
+                print(f"{url} is not in the archive.")
+                return []
 
-                    if current_count > previous_count:
-                        previous_count = current_count
-                        scroll_step += scroll_step
-                        same_count_retries = 0
-                    else:
-                        same_count_retries += 1
-                        print(
-                            f"No new items loaded. Retry {same_count_retries}/{max_retries}")
+            soup = self.make_soup(rendered_html)
+            return soup.find_all('div', class_="item-siminia-product-grid-item-3do")
 
-                        if same_count_retries >= max_retries:
-                            print("No more items being loaded. Done scrolling.")
-                            break
+        try:
+            async with self.browser_pool.page() as page:
+                await page.set_viewport_size({"width": random.randint(
+                    1200, 1600), "height": random.randint(800, 1200)})
+                traffic = await self.prepare_page(page)
+                await page.set_extra_http_headers(headers)
+
+                await self.throttle(url)
+                await page.goto(url, wait_until="domcontentloaded")
+                await page.wait_for_selector('#root-product-list', timeout=30000)
+
+                print(
+                    "Starting to scrape the product list (Infinite scroll scrape)...")
+                await self._load_all_products(page)
 
                 print("Scraping complete. Extracting content...")
 
                 rendered_html = await page.content()
+                self.record_traffic(url, traffic)
+                self.archive_page(url, rendered_html)
                 print(
                     f"Successfully extracted data from {url}"
                 )
-                soup = BeautifulSoup(rendered_html, "html.parser")
+                soup = self.make_soup(rendered_html)
                 return soup.find_all('div', class_="item-siminia-product-grid-item-3do")
 
         except Exception as e:
             print(f"An error occurred: {e}")
 
-        finally:
-            if browser:
-                await browser.close()
-
     def transform(self, soup, url) -> pd.DataFrame:
         product_shop = self.SHOP
         product_name = soup.find(
@@ -149,19 +230,7 @@ class AbensonETL(ProductsETL):
             discounted_price = None
             discount_percentage = None
 
-        feature_data = {
-            'height': None,
-            'width': None,
-            'length': None,
-            'gross_weight': None,
-            'net_weight': None,
-            'screen_size': None,
-            'sim_slot': None,
-            'processor': None,
-            'memory': None,
-            'camera': None,
-            'battery': None
-        }
+        feature_data = empty_features()
         feature_blocks = soup.find_all('div', class_='features-block-2mF')
         for block in feature_blocks:
             title = block.find('div', class_='features-blockTitle-hWK')
@@ -171,31 +240,8 @@ class AbensonETL(ProductsETL):
                 for item in highlights:
                     spans = item.find_all('span')
                     if len(spans) >= 3:
-                        label = spans[0].get_text(strip=True).lower()
-                        value = spans[2].get_text(strip=True)
-
-                        if 'height' in label:
-                            feature_data['height'] = float(value)
-                        elif 'width' in label:
-                            feature_data['width'] = float(value)
-                        elif 'length' in label:
-                            feature_data['length'] = float(value)
-                        elif 'gross weight' in label:
-                            feature_data['gross_weight'] = float(value)
-                        elif 'net weight' in label:
-                            feature_data['net_weight'] = float(value)
-                        elif 'screen size' in label:
-                            feature_data['screen_size'] = value
-                        elif 'sim slot' in label:
-                            feature_data['sim_slot'] = value
-                        elif 'processor' in label:
-                            feature_data['processor'] = value
-                        elif 'memory' in label:
-                            feature_data['memory'] = value
-                        elif 'camera' in label:
-                            feature_data['camera'] = value
-                        elif 'battery' in label:
-                            feature_data['battery'] = value
+                        self.set_feature(feature_data, spans[0].get_text(
+                            strip=True), spans[2].get_text(strip=True))
 
         data = {
             'shop': product_shop,
@@ -224,6 +270,99 @@ class AbensonETL(ProductsETL):
 
         return pd.DataFrame([data])
 
+    def set_feature(self, feature_data: dict, label: str, value):
+        field = self.feature_extractor().classify(str(label))
+        if field is None:
+            return
+
+        value = str(value).strip()
+        if field in NUMERIC_FEATURES:
+            try:
+                feature_data[field] = float(value)
+            except ValueError:
+                pass
+        else:
+            feature_data[field] = value
+
+    def _find_labelled_values(self, node, found: list):
+        if isinstance(node, dict):
+            if 'label' in node and 'value' in node and not isinstance(node['value'], (dict, list)):
+                found.append((node['label'], node['value']))
+            for value in node.values():
+                self._find_labelled_values(value, found)
+        elif isinstance(node, list):
+            for value in node:
+                self._find_labelled_values(value, found)
+        return found
+
+    def find_captured_product(self, responses: list, url: str = None) -> dict:
+        url_key = url.rstrip('/').split('/')[-1].replace(
+            '.html', '') if url else None
+        for body in responses:
+            data = (body or {}).get('data') or {}
+            for result in data.values():
+                items = (result or {}).get('items') if isinstance(
+                    result, dict) else None
+                for item in items or []:
+                    if not isinstance(item, dict) or 'price_range' not in item:
+                        continue
+                    # Related and recommended products come with a
+                    # price_range too, only the page's own product counts.
+                    if url_key is None or item.get('url_key') == url_key:
+                        return item
+        return None
+
+    def capture_complete(self, responses: list, url: str) -> bool:
+        return self.find_captured_product(responses, url) is not None
+
+    def capture_fingerprint_data(self, responses: list, url: str):
+        return self.find_captured_product(responses, url)
+
+    def transform_responses(self, responses: list, url: str) -> pd.DataFrame:
+        item = self.find_captured_product(responses, url)
+        if item is None:
+            return None
+
+        prices = item['price_range']['minimum_price']
+        regular_price = float(prices['regular_price']['value'])
+        final_price = float(prices['final_price']['value'])
+        if final_price < regular_price:
+            price = regular_price
+            discounted_price = final_price
+            discount_percentage = round(
+                (regular_price - final_price) / regular_price, 2)
+        else:
+            price = final_price
+            discounted_price = None
+            discount_percentage = None
+
+        feature_data = empty_features()
+        for label, value in self._find_labelled_values(item, []):
+            self.set_feature(feature_data, label, value)
+
+        description = item.get('meta_description') or BeautifulSoup(
+            (item.get('description') or {}).get('html') or '', "html.parser").get_text(" ", strip=True)
+        variant = BeautifulSoup(
+            (item.get('short_description') or {}).get('html') or '', "html.parser").get_text()
+        rating = item.get('rating_summary')
+
+        data = {
+            'shop': self.SHOP,
+            'name': item['name'],
+            'brand': item.get('brand'),
+            'rating': str(round(float(rating) / 20, 1)) if rating else '0',
+            'description': description,
+            'url': url,
+            'variant': variant,
+            'price': price,
+            'discounted_price': discounted_price,
+            'discount_percentage': discount_percentage,
+            'image_url': (item.get('image') or item.get('small_image') or {}).get('url'),
+            **feature_data,
+        }
+
+        return pd.DataFrame([data])
+
     def extract_links(self, url: str) -> pd.DataFrame:
         soup_product_list = asyncio.run(self._scroll_products(url))
         urls = [self.URL +
@@ -1,55 +1,40 @@
-import asyncio
 import nest_asyncio
 import math
 import re
 import pandas as pd
 from bs4 import BeautifulSoup
 from .products_etl import ProductsETL
+from .woocommerce_etl import WooCommerceMixin
 
 nest_asyncio.apply()
 
 
-class AnsonsETL(ProductsETL):
-    def __init__(self, shop, url, extract_url_link):
-        super().__init__()
-        self.SHOP = shop
-        self.URL = url
-        self.EXTRACT_URL_LINK = extract_url_link
-
-    def transform(self, soup: BeautifulSoup, url: str):
-        product_shop = self.SHOP
-        product_name = soup.find('h1', class_="product_title").get_text()
-        product_brand = soup.find(
-            'meta', attrs={'property': 'product:brand'}).get('content')
+class AnsonsETL(WooCommerceMixin, ProductsETL):
+    PRODUCT_SELECTORS = [
+        'h1.product_title',
+        'p.price',
+        'meta[property="product:brand"]',
+    ]
 
-        product_rating = '0/5'
-
-        if soup.find('div', class_="product-rating-summary"):
-            product_rating = soup.find(
-                'div', class_="product-rating-summary").find('h3').get_text().split(' out')[0] + '/5'
-
-        product_description = soup.find(
-            'meta', attrs={'name': 'description'}).get('content')
-        product_url = url
-        product_variant = None
-        product_image_url = soup.find(
-            'meta', attrs={'property': 'og:image'}).get('content')
+    FINGERPRINT_SELECTORS = [
+        'h1.product_title',
+        'p.price',
+        'meta[property="product:brand"]',
+        'meta[name="description"]',
+        'meta[property="og:image"]',
+        'div.product-rating-summary',
+        '#tab-specification',
+    ]
 
-        discount_price_soup = soup.find('p', class_='price').find('del')
-        if discount_price_soup:
-            price = float(discount_price_soup.get_text(
-                strip=True).replace('₱', '').replace(',', ''))
-            discounted_price = float(soup.find('p', class_='price').find(
-                'ins').get_text(strip=True).replace('₱', '').replace(',', ''))
-            discount_percentage = float(soup.find('p', class_='price').find(
-                'span', class_='discount').get_text(strip=True).replace('-', '').replace('%', '')) / 100
+    LISTING_PAGE_TEMPLATE = "{url}page/{page}/"
 
-        else:
-            price = float(soup.find('p', class_='price').get_text(
-                strip=True).replace('₱', '').replace(',', ''))
-            discounted_price = None
-            discount_percentage = None
+    def __init__(self, shop, url, extract_url_link, **kwargs):
+        super().__init__(**kwargs)
+        self.SHOP = shop
+        self.URL = url
+        self.EXTRACT_URL_LINK = extract_url_link
 
+    def extract_features(self, soup: BeautifulSoup) -> dict:
         feature_data = {
             'height': None,
             'width': None,
@@ -136,6 +121,44 @@ class AnsonsETL(ProductsETL):
                     camera += f" | Front Camera: {front_camera}"
                 feature_data['camera'] = camera
 
+        return feature_data
+
+    def transform(self, soup: BeautifulSoup, url: str):
+        product_shop = self.SHOP
+        product_name = soup.find('h1', class_="product_title").get_text()
+        product_brand = soup.find(
+            'meta', attrs={'property': 'product:brand'}).get('content')
+
+        product_rating = '0/5'
+
+        if soup.find('div', class_="product-rating-summary"):
+            product_rating = soup.find(
+                'div', class_="product-rating-summary").find('h3').get_text().split(' out')[0] + '/5'
+
+        product_description = soup.find(
+            'meta', attrs={'name': 'description'}).get('content')
+        product_url = url
+        product_variant = None
+        product_image_url = soup.find(
+            'meta', attrs={'property': 'og:image'}).get('content')
+
+        discount_price_soup = soup.find('p', class_='price').find('del')
+        if discount_price_soup:
+            price = float(discount_price_soup.get_text(
+                strip=True).replace('₱', '').replace(',', ''))
+            discounted_price = float(soup.find('p', class_='price').find(
+                'ins').get_text(strip=True).replace('₱', '').replace(',', ''))
+            discount_percentage = float(soup.find('p', class_='price').find(
+                'span', class_='discount').get_text(strip=True).replace('-', '').replace('%', '')) / 100
+
+        else:
+            price = float(soup.find('p', class_='price').get_text(
+                strip=True).replace('₱', '').replace(',', ''))
+            discounted_price = None
+            discount_percentage = None
+
+        feature_data = self.extract_features(soup)
+
         data = {
             'shop': product_shop,
             'name': product_name,
@@ -163,22 +186,14 @@ class AnsonsETL(ProductsETL):
 
         return pd.DataFrame([data])
 
-    def extract_links(self, url: str) -> pd.DataFrame:
-        urls = []
-        soup_product_list = asyncio.run(
-            self.extract_scrape_content(url, '#main'))
-        n_product = int(soup_product_list.find('span', class_="br_product_result_count").get(
+    def count_listing_pages(self, soup: BeautifulSoup) -> int:
+        n_product = int(soup.find('span', class_="br_product_result_count").get(
             'data-text').split(' of ')[1].replace(' results', ''))
-        pagination_page_num = math.ceil(n_product / 24)
+        return math.ceil(n_product / 24)
 
-        for i in range(1, pagination_page_num + 1):
-            page_url = f"https://ansons.ph/product-category/smartphones/page/{i}/"
-            product_list_soup = asyncio.run(
-                self.extract_scrape_content(page_url, '#main'))
+    def parse_listing(self, soup: BeautifulSoup) -> list:
+        return [product.find('a', class_="woocommerce-loop-product__link").get('href')
+                for product in soup.find_all('li', class_="type-product")]
 
-            urls.extend([product.find('a', class_="woocommerce-loop-product__link").get('href')
-                        for product in product_list_soup.find_all('li', class_="type-product")])
-
-        df = pd.DataFrame({"url": urls})
-        df.insert(0, "shop", self.SHOP)
-        return df
+    def extract_links(self, url: str) -> pd.DataFrame:
+        return self.extract_listing(url, '#main')
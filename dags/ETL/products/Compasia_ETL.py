@@ -1,21 +1,80 @@
-import re
 import json
-import asyncio
 import nest_asyncio
 import pandas as pd
 from bs4 import BeautifulSoup
 from .products_etl import ProductsETL
+from ETL.libs.features import FeatureRule
+from .shopify_etl import ShopifyMixin
 
 nest_asyncio.apply()
 
 
-class CompAsiaETL(ProductsETL):
-    def __init__(self, shop, url, extract_url_link):
-        super().__init__()
+class CompAsiaETL(ShopifyMixin, ProductsETL):
+    PRODUCT_SELECTORS = [
+        'script[data-product-json]',
+        '#pdp-product-spec',
+    ]
+
+    LISTING_PAGE_TEMPLATE = "{url}?page={page}"
+
+    PARSER = "lxml"
+
+    PARSE_REGIONS = {
+        "script_attrs": ["data-product-json"],
+        "containers": ["#pdp-product-spec"],
+    }
+
+    FEATURE_RULES = [
+        FeatureRule(('length', 'width', 'height'),
+                    r'Dimensions:\s*(\d+(\.\d+)?)\s*x\s*(\d+(\.\d+)?)\s*x\s*(\d+(\.\d+)?)\s*mm',
+                    value=lambda m: dict(zip(('length', 'width', 'height'), map(float, m.groups()[::2]))),
+                    keywords=('Dimensions:',)),
+        FeatureRule(('gross_weight', 'net_weight'), r'Weight:\s*(\d+(\.\d+)?)\s*g',
+                    value=lambda m: {'gross_weight': float(m.group(1)), 'net_weight': float(m.group(1))},
+                    keywords=('Weight:',)),
+        FeatureRule('sim_slot', r'SIM:\s*(.+)',
+                    value=lambda m: m.group(1).strip(), keywords=('SIM:',)),
+        FeatureRule('processor', r'CPU:\s*(.+)',
+                    value=lambda m: m.group(1).strip(), keywords=('CPU:',)),
+        # Combined into memory and camera by features_from_text.
+        FeatureRule('ram', r'RAM:\s*(\d+GB)', keywords=('RAM:',)),
+        FeatureRule('rom', r'ROM:\s*(\d+GB)', keywords=('ROM:',)),
+        FeatureRule('rear_camera', r'Rear Camera:\s*((?s:.+?))(?=Selfie Camera:)',
+                    value=lambda m: m.group(1).replace('\n', ' ').strip(), keywords=('Rear Camera:',)),
+        FeatureRule('selfie_camera', r'Selfie Camera:\s*(.+)',
+                    value=lambda m: m.group(1).strip(), keywords=('Selfie Camera:',)),
+    ]
+
+    def __init__(self, shop, url, extract_url_link, **kwargs):
+        super().__init__(**kwargs)
         self.SHOP = shop
         self.URL = url
         self.EXTRACT_URL_LINK = extract_url_link
 
+    def spec_text(self, soup: BeautifulSoup) -> str:
+        spec_div = soup.find('div', id='pdp-product-spec') or soup
+        return spec_div.get_text(separator='\n')
+
+    def features_from_text(self, text: str) -> dict:
+        feature_data = super().features_from_text(text)
+
+        ram = feature_data.pop('ram', None)
+        rom = feature_data.pop('rom', None)
+        if ram and rom:
+            feature_data['memory'] = f"{ram} RAM + {rom} ROM"
+
+        camera_parts = []
+        rear_camera = feature_data.pop('rear_camera', None)
+        selfie_camera = feature_data.pop('selfie_camera', None)
+        if rear_camera:
+            camera_parts.append("Rear: " + rear_camera)
+        if selfie_camera:
+            camera_parts.append("Front: " + selfie_camera)
+        if camera_parts:
+            feature_data['camera'] = ' | '.join(camera_parts)
+
+        return feature_data
+
     def transform(self, soup: BeautifulSoup, url: str):
         data = json.loads(
             soup.find('script', attrs={'data-product-json': True}).string.strip())
@@ -51,63 +110,7 @@ class CompAsiaETL(ProductsETL):
                 discounted_price.append(None)
                 discount_percentage.append(None)
 
-        feature_data = {
-            'height': None,
-            'width': None,
-            'length': None,
-            'gross_weight': None,
-            'net_weight': None,
-            'screen_size': None,
-            'sim_slot': None,
-            'processor': None,
-            'memory': None,
-            'camera': None,
-            'battery': None
-        }
-
-        spec_div = soup.find('div', id='pdp-product-spec')
-
-        text = spec_div.get_text(separator='\n')
-
-        dim_match = re.search(
-            r'Dimensions:\s*(\d+(\.\d+)?)\s*x\s*(\d+(\.\d+)?)\s*x\s*(\d+(\.\d+)?)\s*mm', text)
-        if dim_match:
-            length, width, height = map(float, dim_match.groups()[::2])
-            feature_data['length'] = length
-            feature_data['width'] = width
-            feature_data['height'] = height
-
-        weight_match = re.search(r'Weight:\s*(\d+(\.\d+)?)\s*g', text)
-        if weight_match:
-            weight = float(weight_match.group(1))
-            feature_data['gross_weight'] = weight
-            feature_data['net_weight'] = weight
-
-        sim_match = re.search(r'SIM:\s*(.+)', text)
-        if sim_match:
-            feature_data['sim_slot'] = sim_match.group(1).strip()
-
-        cpu_match = re.search(r'CPU:\s*(.+)', text)
-        if cpu_match:
-            feature_data['processor'] = cpu_match.group(1).strip()
-
-        ram_match = re.search(r'RAM:\s*(\d+GB)', text)
-        rom_match = re.search(r'ROM:\s*(\d+GB)', text)
-        if ram_match and rom_match:
-            feature_data['memory'] = f"{ram_match.group(1)} RAM + {rom_match.group(1)} ROM"
-
-        rear_camera_match = re.search(
-            r'Rear Camera:\s*(.+?)(?=Selfie Camera:)', text, re.DOTALL)
-        selfie_camera_match = re.search(r'Selfie Camera:\s*(.+)', text)
-        camera_parts = []
-        if rear_camera_match:
-            camera_parts.append(
-                "Rear: " + rear_camera_match.group(1).replace('\n', ' ').strip())
-        if selfie_camera_match:
-            camera_parts.append(
-                "Front: " + selfie_camera_match.group(1).strip())
-        if camera_parts:
-            feature_data['camera'] = ' | '.join(camera_parts)
+        feature_data = self.extract_features(soup)
 
         df = pd.DataFrame({
             'variant': product_variant,
@@ -136,21 +139,13 @@ class CompAsiaETL(ProductsETL):
 
         return df
 
-    def extract_links(self, url: str) -> pd.DataFrame:
-        urls = []
-        soup_product_list = asyncio.run(
-            self.extract_scrape_content(url, '#product-grid'))
-        n_page = int(soup_product_list.find_all(
+    def count_listing_pages(self, soup: BeautifulSoup) -> int:
+        return int(soup.find_all(
             'a', class_="pagination__nav-item")[-1].get_text())
 
-        for i in range(1, n_page + 1):
-            page_url = f"https://compasia.com.ph/collections/smartphones?page={i}"
-            product_list_soup = asyncio.run(
-                self.extract_scrape_content(page_url, '#product-grid'))
+    def parse_listing(self, soup: BeautifulSoup) -> list:
+        return [self.URL + product.find('a').get('href')
+                for product in soup.find_all('div', attrs={'class': ["product-item", "product-item--vertical"]})]
 
-            urls.extend([self.URL + product.find('a').get('href')
-                        for product in product_list_soup.find_all('div', attrs={'class': ["product-item", "product-item--vertical"]})])
-
-        df = pd.DataFrame({"url": urls})
-        df.insert(0, "shop", self.SHOP)
-        return df
+    def extract_links(self, url: str) -> pd.DataFrame:
+        return self.extract_listing(url, '#product-grid')
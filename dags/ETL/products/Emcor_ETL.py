@@ -1,22 +1,68 @@
 import math
 import re
 import json
-import asyncio
 import nest_asyncio
 import pandas as pd
 from bs4 import BeautifulSoup
 from .products_etl import ProductsETL
+from ETL.libs.features import FeatureRule
+from .woocommerce_etl import WooCommerceMixin
 
 nest_asyncio.apply()
 
 
-class EmcorETL(ProductsETL):
-    def __init__(self, shop, url, extract_url_link):
-        super().__init__()
+class EmcorETL(WooCommerceMixin, ProductsETL):
+    PRODUCT_SELECTORS = [
+        'form.variations_form[data-product_variations]',
+        'script[data-flix-fallback-language]',
+        '#tab-description',
+    ]
+
+    FINGERPRINT_SELECTORS = [
+        'meta[property="og:title"]',
+        'meta[name="description"]',
+        'form.variations_form[data-product_variations]',
+        'script[data-flix-fallback-language]',
+        '#tab-description',
+    ]
+
+    LISTING_PAGE_TEMPLATE = "{url}page/{page}/"
+
+    FEATURE_FLAGS = re.IGNORECASE
+
+    FEATURE_RULES = [
+        FeatureRule('height', r'Height:\s*([\d.]+)\s*mm', keywords=('height',)),
+        FeatureRule('width', r'Width:\s*([\d.]+)\s*mm', keywords=('width',)),
+        FeatureRule('length', r'(?:Depth|Length):\s*([\d.]+)\s*mm',
+                    keywords=('depth', 'length')),
+        FeatureRule('gross_weight', r'Weight:\s*(\d+\.?\d*)\s*g', keywords=('weight',)),
+        FeatureRule('net_weight', r'Net Weight:\s*(\d+\.?\d*)\s*g',
+                    keywords=('net weight',)),
+        FeatureRule('screen_size', r'Size:\s*([\d.]+)\s*inches|(\d+\.\d+‑inch)',
+                    keywords=('inch',)),
+        FeatureRule('sim_slot', r'SIM.*(?:Dual SIM|nano-SIM|eSIM)', keywords=('sim',)),
+        FeatureRule('processor', r'(CPU Model|Chip|Processor):\s*(.*?)(?:\n|$)',
+                    keywords=('cpu model', 'chip', 'processor')),
+        FeatureRule('memory', r'Memory.*\n•\s*([\dA-Z +]+)', keywords=('memory',)),
+        FeatureRule('camera', r'(?:Camera|Rear Camera|Advanced dual-camera system|TrueDepth Camera)',
+                    keywords=('camera',)),
+        FeatureRule('battery', r'Battery.*\n•\s*Capacity:?\s*(.*?)(?:\n|$)|Power and Battery.*Video playback:.*',
+                    keywords=('battery',)),
+    ]
+
+    def __init__(self, shop, url, extract_url_link, **kwargs):
+        super().__init__(**kwargs)
         self.SHOP = shop
         self.URL = url
         self.EXTRACT_URL_LINK = extract_url_link
 
+    def catalogue_variant_name(self, product: dict, variation: dict) -> str:
+        return (variation or product).get("sku")
+
+    def spec_text(self, soup: BeautifulSoup) -> str:
+        spec_div = soup.find('div', id='tab-description') or soup
+        return spec_div.get_text(separator='\n', strip=True)
+
     def transform(self, soup: BeautifulSoup, url: str):
         product_shop = self.SHOP
         product_name = soup.find(
@@ -45,41 +91,7 @@ class EmcorETL(ProductsETL):
             discounted_price.append(None)
             discount_percentage.append(None)
 
-        feature_data = {
-            'height': None,
-            'width': None,
-            'length': None,
-            'gross_weight': None,
-            'net_weight': None,
-            'screen_size': None,
-            'sim_slot': None,
-            'processor': None,
-            'memory': None,
-            'camera': None,
-            'battery': None
-        }
-
-        spec_div = soup.find('div', id='tab-description')
-        text = spec_div.get_text(separator='\n', strip=True)
-        patterns = {
-            'height': r'Height:\s*([\d.]+)\s*mm',
-            'width': r'Width:\s*([\d.]+)\s*mm',
-            'length': r'(?:Depth|Length):\s*([\d.]+)\s*mm',
-            'gross_weight': r'Weight:\s*(\d+\.?\d*)\s*g',
-            'net_weight': r'Net Weight:\s*(\d+\.?\d*)\s*g',
-            'screen_size': r'Size:\s*([\d.]+)\s*inches|(\d+\.\d+‑inch)',
-            'sim_slot': r'SIM.*(?:Dual SIM|nano-SIM|eSIM)',
-            'processor': r'(CPU Model|Chip|Processor):\s*(.*?)(?:\n|$)',
-            'memory': r'Memory.*\n•\s*([\dA-Z +]+)',
-            'camera': r'(?:Camera|Rear Camera|Advanced dual-camera system|TrueDepth Camera)',
-            'battery': r'Battery.*\n•\s*Capacity:?\s*(.*?)(?:\n|$)|Power and Battery.*Video playback:.*'
-        }
-
-        for key, pattern in patterns.items():
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                feature_data[key] = next(
-                    (g for g in match.groups() if g), match.group())
+        feature_data = self.extract_features(soup)
 
         df = pd.DataFrame({
             'variant': product_variant,
@@ -108,23 +120,15 @@ class EmcorETL(ProductsETL):
 
         return df
 
-    def extract_links(self, url: str) -> pd.DataFrame:
-        urls = []
-        soup_product_list = asyncio.run(
-            self.extract_scrape_content(url, '#content-area'))
-        tag = soup_product_list.find('p', class_="woocommerce-result-count")
+    def count_listing_pages(self, soup: BeautifulSoup) -> int:
+        tag = soup.find('p', class_="woocommerce-result-count")
         total_results = int(
             re.search(r'of\s+(\d+)', tag.text).group(1)) if tag else None
-        n_pagination = math.ceil(total_results / 20)
+        return math.ceil(total_results / 20) if total_results else 1
 
-        for i in range(1, n_pagination + 1):
-            page_url = f"https://emcor.com.ph/product-category/it-products/smartphone/page/{i}/"
-            product_list_soup = asyncio.run(
-                self.extract_scrape_content(page_url, '#content-area'))
+    def parse_listing(self, soup: BeautifulSoup) -> list:
+        return [product.find('a', class_="woocommerce-loop-product__link").get('href')
+                for product in soup.find_all('li', class_="type-product")]
 
-            urls.extend([product.find('a', class_="woocommerce-loop-product__link").get('href')
-                        for product in product_list_soup.find_all('li', class_="type-product")])
-
-        df = pd.DataFrame({"url": urls})
-        df.insert(0, "shop", self.SHOP)
-        return df
+    def extract_links(self, url: str) -> pd.DataFrame:
+        return self.extract_listing(url, '#content-area')
@@ -1,22 +1,91 @@
 import re
 import json
-import asyncio
 import nest_asyncio
 
 import pandas as pd
 from bs4 import BeautifulSoup
 from .products_etl import ProductsETL
+from ETL.libs.features import FeatureRule
+from .shopify_etl import ShopifyMixin
 
 nest_asyncio.apply()
 
 
-class KimStoreETL(ProductsETL):
-    def __init__(self, shop, url, extract_url_link):
-        super().__init__()
+def sim_slot(match) -> str:
+    line = match.group().lower()
+    if 'dual' in line:
+        return 'Dual SIM'
+    if 'single' in line:
+        return 'Single SIM'
+    if 'esim' in line:
+        return 'eSIM'
+    return None
+
+
+def battery(match) -> str:
+    capacity = re.search(r'(\d{3,5})\s*mAh', match.group(), re.IGNORECASE)
+    return capacity.group(1) if capacity else match.group().strip()
+
+
+class KimStoreETL(ShopifyMixin, ProductsETL):
+    PRODUCT_SELECTORS = [
+        'script[type="application/json"]',
+        'span.product__text-type',
+        'div.about__accordion-description',
+    ]
+
+    FINGERPRINT_SELECTORS = [
+        'meta[property^="og:"]',
+        'script[type="application/json"]',
+        'span.product__text-type',
+        'div.about__accordion-description',
+    ]
+
+    LISTING_PAGE_TEMPLATE = "{url}?page={page}"
+
+    PARSER = "lxml"
+
+    # One spec per line, each rule runs on the lines holding its keywords.
+    FEATURE_FLAGS = re.IGNORECASE
+    FEATURE_PER_LINE = True
+
+    FEATURE_RULES = [
+        FeatureRule('height', r'height.*?([\d.]+)\s*mm',
+                    overwrite=True, keywords=('height',)),
+        FeatureRule('width', r'width.*?([\d.]+)\s*mm',
+                    overwrite=True, keywords=('width',)),
+        FeatureRule('length', r'(?:depth|length).*?([\d.]+)\s*mm',
+                    overwrite=True, keywords=('depth', 'length')),
+        # The first weight is the net weight, a second one the gross weight.
+        FeatureRule(('net_weight', 'gross_weight'), r'([\d,]+)\s*g',
+                    value=lambda m: m.group(1).replace(',', ''), keywords=('weight',)),
+        FeatureRule('screen_size', r'(\d{1,2}\.?\d*)\s*inch',
+                    overwrite=True, keywords=('display', 'screen')),
+        FeatureRule('sim_slot', r'.+',
+                    value=sim_slot, overwrite=True, keywords=('sim',)),
+        FeatureRule('processor', r'.+',
+                    overwrite=True, keywords=('chip', 'processor', 'cpu')),
+        # Lines naming both RAM and ROM. Anchored, an unanchored search
+        # retries the greedy .* from every position of a line without ROM.
+        FeatureRule('memory', r'^.*rom.*',
+                    overwrite=True, keywords=('ram',)),
+        FeatureRule('camera', r'.+', keywords=('camera',)),
+        FeatureRule('battery', r'.+', value=battery, keywords=('battery',)),
+    ]
+
+    def __init__(self, shop, url, extract_url_link, **kwargs):
+        super().__init__(**kwargs)
         self.SHOP = shop
         self.URL = url
         self.EXTRACT_URL_LINK = extract_url_link
 
+    def catalogue_variant_name(self, product: dict, variant: dict) -> str:
+        return f"{product['title']} - {variant['title']}"
+
+    def spec_text(self, soup: BeautifulSoup) -> str:
+        div = soup.find('div', class_="about__accordion-description") or soup
+        return div.get_text(separator='\n', strip=True)
+
     def transform(self, soup: BeautifulSoup, url: str):
         product_shop = self.SHOP
         product_name = soup.find(
@@ -62,89 +131,7 @@ class KimStoreETL(ProductsETL):
             discounted_price.append(discount_price)
             discount_percentage.append(discount_percent)
 
-        feature_data = {
-            'height': None,
-            'width': None,
-            'length': None,
-            'gross_weight': None,
-            'net_weight': None,
-            'screen_size': None,
-            'sim_slot': None,
-            'processor': None,
-            'memory': None,
-            'camera': None,
-            'battery': None
-        }
-
-        div = soup.find_all('div', class_="about__accordion-description")[0]
-        lines = div.get_text(separator='\n', strip=True).splitlines()
-
-        for line in lines:
-            # Normalize for matching
-            norm_line = line.lower()
-
-            # Dimensions
-            if 'height' in norm_line and 'mm' in norm_line:
-                match = re.search(r'height.*?([\d.]+)\s*mm', norm_line)
-                if match:
-                    feature_data['height'] = match.group(1)
-            if 'width' in norm_line and 'mm' in norm_line:
-                match = re.search(r'width.*?([\d.]+)\s*mm', norm_line)
-                if match:
-                    feature_data['width'] = match.group(1)
-            if ('depth' in norm_line or 'length' in norm_line) and 'mm' in norm_line:
-                match = re.search(
-                    r'(?:depth|length).*?([\d.]+)\s*mm', norm_line)
-                if match:
-                    feature_data['length'] = match.group(1)
-
-            # Weight
-            if 'weight' in norm_line and 'g' in norm_line:
-                match = re.findall(r'([\d,]+)\s*g', norm_line)
-                if match:
-                    # Assign first match to net_weight if not set, otherwise gross
-                    weight = match[0].replace(',', '')
-                    if not feature_data['net_weight']:
-                        feature_data['net_weight'] = weight
-                    elif not feature_data['gross_weight']:
-                        feature_data['gross_weight'] = weight
-
-            # Screen
-            if 'display' in norm_line or 'screen' in norm_line:
-                match = re.search(
-                    r'(\d{1,2}\.?\d*)\s*(inches|inch)', norm_line)
-                if match:
-                    feature_data['screen_size'] = match.group(1)
-
-            # SIM Slot
-            if 'sim' in norm_line:
-                if 'dual' in norm_line:
-                    feature_data['sim_slot'] = 'Dual SIM'
-                elif 'single' in norm_line:
-                    feature_data['sim_slot'] = 'Single SIM'
-                elif 'eSIM' in norm_line:
-                    feature_data['sim_slot'] = 'eSIM'
-
-            # Processor
-            if any(term in norm_line for term in ['chip', 'chipset', 'processor', 'cpu']):
-                feature_data['processor'] = line.strip()
-
-            # Memory
-            if 'ram' in norm_line and 'rom' in norm_line:
-                feature_data['memory'] = line.strip()
-
-            # Camera
-            if 'camera' in norm_line:
-                if not feature_data['camera']:
-                    feature_data['camera'] = line.strip()
-
-            # Battery
-            if 'battery' in norm_line and not feature_data['battery']:
-                match = re.search(r'(\d{3,5})\s*mAh', norm_line)
-                if match:
-                    feature_data['battery'] = match.group(1)
-                else:
-                    feature_data['battery'] = line.strip()
+        feature_data = self.extract_features(soup)
 
         df = pd.DataFrame({
             'variant': product_variant,
@@ -173,19 +160,13 @@ class KimStoreETL(ProductsETL):
 
         return df
 
+    def count_listing_pages(self, soup: BeautifulSoup) -> int:
+        return int(soup.find_all('a', class_="pagination__item")
+                   [-1].find('span').get_text())
+
+    def parse_listing(self, soup: BeautifulSoup) -> list:
+        return [self.URL + product.find('a').get('href')
+                for product in soup.find_all('li', class_="collection-product-card")]
+
     def extract_links(self, url: str) -> pd.DataFrame:
-        urls = []
-        soup = asyncio.run(self.extract_scrape_content(url, '#product-grid'))
-        n_page = int(soup.find_all('a', class_="pagination__item")
-                     [-1].find('span').get_text())
-
-        for i in range(1, n_page + 1):
-            page_url = f"https://www.kimstore.com/collections/smartphones?page={i}"
-            product_list_soup = asyncio.run(
-                self.extract_scrape_content(page_url, '#product-grid'))
-
-            urls.extend([self.URL + product.find('a').get('href')
-                        for product in product_list_soup.find_all('li', class_="collection-product-card")])
-        df = pd.DataFrame({"url": urls})
-        df.insert(0, "shop", self.SHOP)
-        return df
+        return self.extract_listing(url, '#product-grid')
@@ -6,17 +6,68 @@ import nest_asyncio
 import pandas as pd
 from bs4 import BeautifulSoup
 from .products_etl import ProductsETL
+from .woocommerce_etl import WooCommerceMixin
 
 nest_asyncio.apply()
 
 
-class MxmemoxpressETL(ProductsETL):
-    def __init__(self, shop, url, extract_url_link):
-        super().__init__()
+class MxmemoxpressETL(WooCommerceMixin, ProductsETL):
+    PRODUCT_SELECTORS = [
+        'script[type="application/ld+json"]',
+        'form.variations_form[data-product_variations]',
+        'div.et_pb_post_content',
+    ]
+
+    PARSE_REGIONS = {
+        "script_types": ["application/ld+json"],
+        "containers": ["form.variations_form", "div.et_pb_post_content"],
+    }
+
+    def __init__(self, shop, url, extract_url_link, **kwargs):
+        super().__init__(**kwargs)
         self.SHOP = shop
         self.URL = url
         self.EXTRACT_URL_LINK = extract_url_link
 
+    def catalogue_brand(self, product: dict) -> str:
+        return product["name"].split(' ')[0]
+
+    def extract_features(self, soup: BeautifulSoup) -> dict:
+        feature_data = {
+            'height': None,
+            'width': None,
+            'length': None,
+            'gross_weight': None,
+            'net_weight': None,
+            'screen_size': None,
+            'sim_slot': None,
+            'processor': None,
+            'memory': None,
+            'camera': None,
+            'battery': None
+        }
+
+        spec_div = soup.find('div', class_="et_pb_post_content") or soup
+        lis = spec_div.find_all('li')
+
+        for li in lis:
+            text = li.get_text(strip=True).lower()
+
+            if "display" in text:
+                feature_data['screen_size'] = text.split(":")[1].strip()
+            elif "chip" in text or "processor" in text:
+                feature_data['processor'] = text.split(":")[1].strip()
+            elif "ram" in text:
+                feature_data['memory'] = text.split(":")[1].strip()
+            elif "rear camera" in text or "front camera" in text or "camera" in text:
+                feature_data['camera'] = text.split(":")[1].strip()
+            elif "battery" in text:
+                feature_data['battery'] = text.split(":")[1].strip()
+            elif "sim" in text:
+                feature_data['sim_slot'] = text.split(":")[1].strip()
+
+        return feature_data
+
     def transform(self, soup: BeautifulSoup, url: str):
         product = json.loads(
             soup.find('script', attrs={'type': 'application/ld+json'}).get_text())
@@ -67,38 +118,7 @@ class MxmemoxpressETL(ProductsETL):
             discounted_price.append(discount_price)
             discount_percentage.append(discount_percent)
 
-        feature_data = {
-            'height': None,
-            'width': None,
-            'length': None,
-            'gross_weight': None,
-            'net_weight': None,
-            'screen_size': None,
-            'sim_slot': None,
-            'processor': None,
-            'memory': None,
-            'camera': None,
-            'battery': None
-        }
-
-        spec_div = soup.find('div', class_="et_pb_post_content")
-        lis = spec_div.find_all('li')
-
-        for li in lis:
-            text = li.get_text(strip=True).lower()
-
-            if "display" in text:
-                feature_data['screen_size'] = text.split(":")[1].strip()
-            elif "chip" in text or "processor" in text:
-                feature_data['processor'] = text.split(":")[1].strip()
-            elif "ram" in text:
-                feature_data['memory'] = text.split(":")[1].strip()
-            elif "rear camera" in text or "front camera" in text or "camera" in text:
-                feature_data['camera'] = text.split(":")[1].strip()
-            elif "battery" in text:
-                feature_data['battery'] = text.split(":")[1].strip()
-            elif "sim" in text:
-                feature_data['sim_slot'] = text.split(":")[1].strip()
+        feature_data = self.extract_features(soup)
 
         df = pd.DataFrame({
             'variant': product_variant,
@@ -128,7 +148,7 @@ class MxmemoxpressETL(ProductsETL):
         return df
 
     def extract_links(self, url: str) -> pd.DataFrame:
-        soup = asyncio.run(self.extract_scrape_content(url, '#main-content'))
+        soup = asyncio.run(self.fetch_page(url, '#main-content'))
 
         urls = [product.find('a').get('href') for product in soup.find_all(
             'li', attrs={'class': ["product", "type-product", 'status-publish ']})]
@@ -6,57 +6,36 @@ import nest_asyncio
 import pandas as pd
 from bs4 import BeautifulSoup
 from .products_etl import ProductsETL
+from .woocommerce_etl import WooCommerceMixin
 
 nest_asyncio.apply()
 
 
-class MyPhoneETL(ProductsETL):
-    def __init__(self, shop, url, extract_url_link):
-        super().__init__()
+class MyPhoneETL(WooCommerceMixin, ProductsETL):
+    PRODUCT_SELECTORS = [
+        'meta[property="og:title"]',
+        'meta[itemprop="image"]',
+    ]
+
+    FINGERPRINT_SELECTORS = [
+        'meta[property^="og:"]',
+        'meta[itemprop="image"]',
+        'del',
+        'ins',
+        'div.product_field.price',
+        'div.g-cols.vc_inner',
+    ]
+
+    def __init__(self, shop, url, extract_url_link, **kwargs):
+        super().__init__(**kwargs)
         self.SHOP = shop
         self.URL = url
         self.EXTRACT_URL_LINK = extract_url_link
 
-    def transform(self, soup: BeautifulSoup, url: str):
-        product_shop = self.SHOP
-        product_name = soup.find(
-            'meta', attrs={'property': 'og:title'}).get('content')
-        product_brand = self.SHOP
-        product_rating = '0/5'
-
-        product_description = soup.find(
-            'meta', attrs={'property': 'og:description'}).get('content')
-        product_url = url
-        product_variant = None
-        product_image_url = soup.find(
-            'meta', attrs={'itemprop': 'image'}).get('content')
-
-        price_del_tag = soup.find('del')
-        price_ins_tag = soup.find('ins')
-
-        if price_del_tag and price_ins_tag:
-            price = price_del_tag.get_text(
-                strip=True).replace('₱', '').replace(',', '')
-            discounted_price = price_ins_tag.get_text(
-                strip=True).replace('₱', '').replace(',', '')
-            discount_percentage = round(
-                (float(price) - float(discounted_price)) / float(price), 2)
-        else:
-            price_tag = soup.find(
-                'div', class_='w-post-elm product_field price')
-            if price_tag:
-                amount_tag = price_tag.find(
-                    'span', class_="woocommerce-Price-amount")
-                if amount_tag:
-                    price = amount_tag.get_text(strip=True).replace(
-                        '₱', '').replace(',', '')
-                    discounted_price = None
-                    discount_percentage = None
-                else:
-                    price = discounted_price = discount_percentage = None
-            else:
-                price = discounted_price = discount_percentage = None
+    def catalogue_brand(self, product: dict) -> str:
+        return self.SHOP
 
+    def extract_features(self, soup: BeautifulSoup) -> dict:
         feature_data = {
             'height': None,
             'width': None,
@@ -104,6 +83,50 @@ class MyPhoneETL(ProductsETL):
                 elif 'battery' in label:
                     feature_data['battery'] = value
 
+        return feature_data
+
+    def transform(self, soup: BeautifulSoup, url: str):
+        product_shop = self.SHOP
+        product_name = soup.find(
+            'meta', attrs={'property': 'og:title'}).get('content')
+        product_brand = self.SHOP
+        product_rating = '0/5'
+
+        product_description = soup.find(
+            'meta', attrs={'property': 'og:description'}).get('content')
+        product_url = url
+        product_variant = None
+        product_image_url = soup.find(
+            'meta', attrs={'itemprop': 'image'}).get('content')
+
+        price_del_tag = soup.find('del')
+        price_ins_tag = soup.find('ins')
+
+        if price_del_tag and price_ins_tag:
+            price = price_del_tag.get_text(
+                strip=True).replace('₱', '').replace(',', '')
+            discounted_price = price_ins_tag.get_text(
+                strip=True).replace('₱', '').replace(',', '')
+            discount_percentage = round(
+                (float(price) - float(discounted_price)) / float(price), 2)
+        else:
+            price_tag = soup.find(
+                'div', class_='w-post-elm product_field price')
+            if price_tag:
+                amount_tag = price_tag.find(
+                    'span', class_="woocommerce-Price-amount")
+                if amount_tag:
+                    price = amount_tag.get_text(strip=True).replace(
+                        '₱', '').replace(',', '')
+                    discounted_price = None
+                    discount_percentage = None
+                else:
+                    price = discounted_price = discount_percentage = None
+            else:
+                price = discounted_price = discount_percentage = None
+
+        feature_data = self.extract_features(soup)
+
         data = {
             'shop': product_shop,
             'name': product_name,
@@ -132,7 +155,7 @@ class MyPhoneETL(ProductsETL):
         return pd.DataFrame([data])
 
     def extract_links(self, url: str) -> pd.DataFrame:
-        soup = asyncio.run(self.extract_scrape_content(url, '#page-content'))
+        soup = asyncio.run(self.fetch_page(url, '#page-content'))
         urls = [product.find('a').get('href') for product in soup.find_all(
             'article',  attrs={'class': ["product", 'type-product']})]
 
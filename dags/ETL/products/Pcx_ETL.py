@@ -6,45 +6,46 @@ import nest_asyncio
 import pandas as pd
 from bs4 import BeautifulSoup
 from .products_etl import ProductsETL
+from .shopify_etl import ShopifyMixin
 
 nest_asyncio.apply()
 
 
-class PcxETL(ProductsETL):
-    def __init__(self, shop, url, extract_url_link):
-        super().__init__()
+class PcxETL(ShopifyMixin, ProductsETL):
+    PRODUCT_SELECTORS = [
+        'main script[type="application/ld+json"]',
+        'div.t4s-main-area div[data-t4s-zoom-main]',
+        'table.MsoNormalTable',
+    ]
+
+    FINGERPRINT_SELECTORS = [
+        'main script[type="application/ld+json"]',
+        'meta[property="og:image"]',
+        'div.t4s-sku-wrapper',
+        'div.t4s-main-area div[data-t4s-zoom-main]',
+        'table.MsoNormalTable',
+    ]
+
+    PARSER = "lxml"
+
+    PARSE_REGIONS = {
+        "meta_properties": ["og:"],
+        "containers": ["main"],
+    }
+
+    def __init__(self, shop, url, extract_url_link, **kwargs):
+        super().__init__(**kwargs)
         self.SHOP = shop
         self.URL = url
         self.EXTRACT_URL_LINK = extract_url_link
 
-    def transform(self, soup: BeautifulSoup, url: str):
-        product_data = json.loads(soup.find('main').find(
-            'script', attrs={'type': 'application/ld+json'}).get_text())
-        product_shop = self.SHOP
-        product_name = product_data['name']
-        product_brand = product_data['brand']['name']
-        product_rating = '0/5'
-
-        product_description = product_data['description']
-        product_url = url
-        product_variant = soup.find(
-            'div', class_="t4s-sku-wrapper").find('span').get_text()
-        product_image_url = soup.find(
-            'meta', attrs={'property': 'og:image'}).get('content')
-
-        price_component = json.loads(soup.find('div', class_="t4s-main-area").find(
-            'div', attrs={'data-t4s-zoom-main': True}).get('data-product-featured'))
+    def catalogue_variants(self, product: dict) -> list:
+        return product["variants"][:1]
 
-        if price_component['compare_at_price'] is None:
-            price = price_component['price'] / 100
-            discounted_price = None
-            discount_percentage = None
-        else:
-            price = price_component['compare_at_price'] / 100
-            discounted_price = price_component['price'] / 100
-            discount_percentage = round(
-                (float(price) - float(discounted_price)) / float(price), 2)
+    def catalogue_variant_name(self, product: dict, variant: dict) -> str:
+        return variant["sku"]
 
+    def extract_features(self, soup: BeautifulSoup) -> dict:
         feature_data = {
             'height': None,
             'width': None,
@@ -59,7 +60,7 @@ class PcxETL(ProductsETL):
             'battery': None
         }
 
-        spec_data = soup.find('table', class_='MsoNormalTable')
+        spec_data = soup.find('table', class_='MsoNormalTable') or soup
         rows = spec_data.find_all('tr')
         for row in rows:
             cells = row.find_all('td')
@@ -129,6 +130,38 @@ class PcxETL(ProductsETL):
             elif "SIM Support" in label:
                 feature_data['sim_slot'] = value
 
+        return feature_data
+
+    def transform(self, soup: BeautifulSoup, url: str):
+        product_data = json.loads(soup.find('main').find(
+            'script', attrs={'type': 'application/ld+json'}).get_text())
+        product_shop = self.SHOP
+        product_name = product_data['name']
+        product_brand = product_data['brand']['name']
+        product_rating = '0/5'
+
+        product_description = product_data['description']
+        product_url = url
+        product_variant = soup.find(
+            'div', class_="t4s-sku-wrapper").find('span').get_text()
+        product_image_url = soup.find(
+            'meta', attrs={'property': 'og:image'}).get('content')
+
+        price_component = json.loads(soup.find('div', class_="t4s-main-area").find(
+            'div', attrs={'data-t4s-zoom-main': True}).get('data-product-featured'))
+
+        if price_component['compare_at_price'] is None:
+            price = price_component['price'] / 100
+            discounted_price = None
+            discount_percentage = None
+        else:
+            price = price_component['compare_at_price'] / 100
+            discounted_price = price_component['price'] / 100
+            discount_percentage = round(
+                (float(price) - float(discounted_price)) / float(price), 2)
+
+        feature_data = self.extract_features(soup)
+
         data = {
             'shop': product_shop,
             'name': product_name,
@@ -157,7 +190,7 @@ class PcxETL(ProductsETL):
         return pd.DataFrame([data])
 
     def extract_links(self, url: str) -> pd.DataFrame:
-        soup = asyncio.run(self.extract_scrape_content(url, '#MainContent'))
+        soup = asyncio.run(self.fetch_page(url, '#MainContent'))
         urls = [self.URL + product.find('a').get('href') for product in soup.find(
             'div', class_="t4s_box_pr_grid").find_all('div', class_="t4s-product")]
 
@@ -1,58 +1,46 @@
 import math
 import re
 import json
-import asyncio
 import nest_asyncio
 import pandas as pd
 from bs4 import BeautifulSoup
 from .products_etl import ProductsETL
+from .shopify_etl import ShopifyMixin
 
 nest_asyncio.apply()
 
 
-class SavenearnETL(ProductsETL):
-    def __init__(self, shop, url, extract_url_link):
-        super().__init__()
-        self.SHOP = shop
-        self.URL = url
-        self.EXTRACT_URL_LINK = extract_url_link
+class SavenearnETL(ShopifyMixin, ProductsETL):
+    PRODUCT_SELECTORS = [
+        'script[type="application/ld+json"]',
+        '#widget-fave-html div[data-params]',
+        'div.product-block-list__item--description',
+    ]
 
-    def transform(self, soup: BeautifulSoup, url: str):
-        product_data = json.loads(soup.find_all(
-            'script', attrs={'type': 'application/ld+json'})[0].get_text())
-        product_shop = self.SHOP
-        product_name = product_data['name']
-        product_brand = product_data['brand']['name']
-        product_rating = '0/5'
+    FINGERPRINT_SELECTORS = [
+        'script[type="application/ld+json"]',
+        'meta[property="og:image"]',
+        '#widget-fave-html div[data-params]',
+        'div.product-block-list__item--description',
+    ]
 
-        product_description = product_data['description']
-        product_url = url
-        product_image_url = soup.find(
-            'meta', attrs={'property': 'og:image'}).get('content')
-        variant_component = json.loads(
-            soup.find('div', id="widget-fave-html").find('div').get('data-params'))
+    LISTING_PAGE_TEMPLATE = "{url}?page={page}"
 
-        product_variant = []
-        prices = []
-        discounted_price = []
-        discount_percentage = []
+    PARSER = "lxml"
 
-        for variant in variant_component['variants']:
-            if variant['compare_price'] is None:
-                price = variant['price']
-                discount_price = None
-                discount_percent = None
-            else:
-                price = variant['compare_price']
-                discount_price = variant['price']
-                discount_percent = round(
-                    (float(price) - float(discount_price)) / float(price), 2)
+    PARSE_REGIONS = {
+        "script_types": ["application/ld+json"],
+        "meta_properties": ["og:"],
+        "containers": ["#widget-fave-html", "div.product-block-list__item--description"],
+    }
 
-            product_variant.append(variant['title'])
-            prices.append(price)
-            discounted_price.append(discount_price)
-            discount_percentage.append(discount_percent)
+    def __init__(self, shop, url, extract_url_link, **kwargs):
+        super().__init__(**kwargs)
+        self.SHOP = shop
+        self.URL = url
+        self.EXTRACT_URL_LINK = extract_url_link
 
+    def extract_features(self, soup: BeautifulSoup) -> dict:
         feature_data = {
             'height': None,
             'width': None,
@@ -68,7 +56,7 @@ class SavenearnETL(ProductsETL):
         }
 
         spec_div = soup.find(
-            'div', class_="product-block-list__item--description")
+            'div', class_="product-block-list__item--description") or soup
         text = re.sub(r'\s+', ' ', spec_div.get_text(separator='\n'))
 
         # -------- Dimensions (height, width, length)
@@ -115,6 +103,46 @@ class SavenearnETL(ProductsETL):
         if battery_match:
             feature_data['battery'] = int(battery_match.group(1))
 
+        return feature_data
+
+    def transform(self, soup: BeautifulSoup, url: str):
+        product_data = json.loads(soup.find_all(
+            'script', attrs={'type': 'application/ld+json'})[0].get_text())
+        product_shop = self.SHOP
+        product_name = product_data['name']
+        product_brand = product_data['brand']['name']
+        product_rating = '0/5'
+
+        product_description = product_data['description']
+        product_url = url
+        product_image_url = soup.find(
+            'meta', attrs={'property': 'og:image'}).get('content')
+        variant_component = json.loads(
+            soup.find('div', id="widget-fave-html").find('div').get('data-params'))
+
+        product_variant = []
+        prices = []
+        discounted_price = []
+        discount_percentage = []
+
+        for variant in variant_component['variants']:
+            if variant['compare_price'] is None:
+                price = variant['price']
+                discount_price = None
+                discount_percent = None
+            else:
+                price = variant['compare_price']
+                discount_price = variant['price']
+                discount_percent = round(
+                    (float(price) - float(discount_price)) / float(price), 2)
+
+            product_variant.append(variant['title'])
+            prices.append(price)
+            discounted_price.append(discount_price)
+            discount_percentage.append(discount_percent)
+
+        feature_data = self.extract_features(soup)
+
         df = pd.DataFrame({
             'variant': product_variant,
             'price': prices,
@@ -142,21 +170,14 @@ class SavenearnETL(ProductsETL):
 
         return df
 
-    def extract_links(self, url: str) -> pd.DataFrame:
-        soup = asyncio.run(self.extract_scrape_content(url, '#main'))
-        urls = []
+    def count_listing_pages(self, soup: BeautifulSoup) -> int:
         n_product = int(soup.find(
             'span', class_="collection__showing-count").get_text().split('of ')[-1].replace(' products', ''))
-        pagination_page_num = math.ceil(n_product / 24)
-
-        for i in range(1, pagination_page_num + 1):
-            page_url = f"https://savenearn.com.ph/collections/smartphone?page={i}"
-            product_list_soup = asyncio.run(
-                self.extract_scrape_content(page_url, '#main'))
+        return math.ceil(n_product / 24)
 
-            urls.extend([self.URL + product.find('a').get('href')
-                        for product in product_list_soup.find_all('div', class_="product-item--vertical")])
+    def parse_listing(self, soup: BeautifulSoup) -> list:
+        return [self.URL + product.find('a').get('href')
+                for product in soup.find_all('div', class_="product-item--vertical")]
 
-        df = pd.DataFrame({"url": urls})
-        df.insert(0, "shop", self.SHOP)
-        return df
+    def extract_links(self, url: str) -> pd.DataFrame:
+        return self.extract_listing(url, '#main')
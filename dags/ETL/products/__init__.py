@@ -1,4 +1,6 @@
-from .products_etl import ProductsETL
+from .products_etl import ProductsETL, CatalogueUnavailable
+from .shopify_etl import ShopifyMixin
+from .woocommerce_etl import WooCommerceMixin
 from .Abenson_ETL import AbensonETL
 from .Ansons_ETL import AnsonsETL
 from .Compasia_ETL import CompAsiaETL
@@ -8,4 +10,3 @@ from .Mxmemoxpress_ETL import MxmemoxpressETL
 from .Myphone_ETL import MyPhoneETL
 from .Pcx_ETL import PcxETL
 from .Savenearn_ETL import SavenearnETL
-from .Western_ETL import WesternETL
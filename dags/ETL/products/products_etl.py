@@ -1,28 +1,87 @@
+import math
+import json
+import time
 import random
-import requests
+import httpx
 import pandas as pd
 from datetime import datetime as dt
 from abc import ABC, abstractmethod
+from collections import defaultdict
+from urllib.parse import urlparse
 from bs4 import BeautifulSoup
 from sqlalchemy.engine import Engine
-from ETL.libs.utils import get_sql_from_file, update_url_scrape_status, execute_query
-from tenacity import (
-    retry,
-    retry_if_exception_type,
-    stop_after_attempt,
-    wait_random,
-)
+from ETL.libs.utils import get_sql_from_file, execute_query
+from ETL.libs.browser_pool import BrowserPool
+from ETL.libs.metrics import Metrics
+from ETL.libs.pipeline import Stage, BatchStage
+from ETL.libs.loader import CopyLoader
+from ETL.libs.status_writer import StatusWriter
+from ETL.libs.rate_limit import HostScheduler
+from ETL.libs.archive import HtmlArchive
+from ETL.libs.fingerprint import fingerprint_soup, fingerprint_data
+from ETL.libs.capture import ResponseCapture
+from ETL.libs.http_client import AsyncHttpClient
+from ETL.libs.fetch_policy import FetchPolicy, FetchDeferred, ContentMissing
+from ETL.libs.features import FeatureExtractor
+from ETL.libs.parsing import make_soup, resolve_parser, extract_regions, DEFAULT_PARSER
+from ETL.libs.interception import RequestBlocker, BLOCKED_RESOURCE_TYPES, BLOCKED_DOMAINS
 import asyncio
+import multiprocessing
 import nest_asyncio
-from playwright.async_api import async_playwright
+from concurrent.futures import ProcessPoolExecutor
 from fake_useragent import UserAgent
-from bs4 import BeautifulSoup
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 nest_asyncio.apply()
 
-MAX_RETRIES = 10
-MAX_WAIT_BETWEEN_REQ = 2
-MIN_WAIT_BETWEEN_REQ = 0
+MAX_RETRIES = 4
+BACKOFF_BASE = 1
+BACKOFF_MAX = 30
 REQUEST_TIMEOUT = 30
+SELECTOR_TIMEOUT = 30
+PAGE_DEADLINE = 120
+
+# Hours after which a DONE page is fetched again to look for changes.
+RECHECK_AFTER = 24
+
+# Consecutive failed URLs, retries spent, before a host's circuit opens, and
+# how long it stays open before requests are let through again. Missing
+# selectors don't count.
+BREAKER_THRESHOLD = 5
+BREAKER_RESET = 300
+
+RENDER_POLICIES = ("http", "browser", "auto")
+
+BROWSER_POOL_SIZE = 1
+CONTEXTS_PER_BROWSER = 2
+MAX_CONTEXT_USES = 50
+
+PROGRESS_EVERY = 25
+PARSE_QUEUE_SIZE = 32
+
+# Pipeline stages, see run_async. URLs are read in chunks of
+# URL_BATCH_SIZE, rows loaded and statuses written in batches that are
+# flushed when full or FLUSH_INTERVAL seconds old.
+URL_BATCH_SIZE = 500
+LOAD_BATCH_ROWS = 1000
+STATUS_BATCH_SIZE = 100
+FLUSH_INTERVAL = 5
+LATENCY_HISTOGRAMS = ("fetch_stage", "parse_stage", "load_stage",
+                      "status_stage", "copy_flush", "status_flush")
+LISTING_CONCURRENCY = 4
+CAPTURE_TIMEOUT = 15
+
+DEFAULT_RATE_LIMIT = 1.0
+DEFAULT_BURST = 2
+GLOBAL_RATE_LIMIT = 20.0
+
+# Feature extractors compiled once per process, keyed by shop class.
+feature_extractors = {}
+
+scheduler = HostScheduler(
+    default_rate=DEFAULT_RATE_LIMIT,
+    default_burst=DEFAULT_BURST,
+    global_rate=GLOBAL_RATE_LIMIT,
+)
 
 headers = {
     "Accept": 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
@@ -41,102 +100,444 @@ headers = {
     "Sec-Fetch-User": "?1"
 }
 
+# The HTTP client advertises the encodings it has decoders installed for.
+http_headers = {k: v for k, v in headers.items() if k != 'Accept-Encoding'}
+
+
+class CatalogueUnavailable(Exception):
+    pass
+
+
+# Shop instance of a parse worker process, see run_async.
+worker_etl = None
+
+
+def init_parse_worker(cls, shop: str, url: str, extract_url_link: str, kwargs: dict):
+    global worker_etl
+    worker_etl = cls(shop, url, extract_url_link, **kwargs)
+
+
+def parse_in_worker(url: str, html: str, responses: list, known_fingerprint: str, required: list) -> tuple:
+    return worker_etl.parse_page(url, html, responses, known_fingerprint, required)
+
 
 class ProductsETL(ABC):
-    def __init__(self):
-        self.session = requests.Session()
+    # Elements a product page must contain for transform to work. In "auto"
+    # render mode a plain HTTP response missing any of them is re-fetched
+    # through the browser.
+    PRODUCT_SELECTORS = []
+
+    # Parts of a product page transform reads. A page whose fingerprint over
+    # these is unchanged since the last run is not transformed again.
+    # Defaults to PRODUCT_SELECTORS.
+    FINGERPRINT_SELECTORS = None
+
+    # Listing page URL for paginated shops, formatted with the listing url
+    # passed to extract_links and the 1-based page number.
+    LISTING_PAGE_TEMPLATE = None
+
+    # Network responses kept while rendering a product page when
+    # capture_responses is on: URL regexes, optionally narrowed down to
+    # GraphQL operation names.
+    CAPTURE_URL_PATTERNS = []
+    CAPTURE_OPERATIONS = []
+
+    # BeautifulSoup tree builder for fetched pages, see ETL.libs.parsing.
+    # Transforms get the same bs4 API whichever one is used.
+    PARSER = DEFAULT_PARSER
+
+    # Parts of a product page transform reads, see extract_regions in
+    # ETL.libs.parsing. When set, product pages are parsed from those
+    # regions only, falling back to the whole page if a PRODUCT_SELECTOR is
+    # missing from them. None parses the whole page.
+    PARSE_REGIONS = None
+
+    # Spec sheet pattern table for the shared feature engine, see
+    # ETL.libs.features. Shops using it implement spec_text.
+    FEATURE_RULES = None
+    FEATURE_FLAGS = 0
+    FEATURE_PER_LINE = False
+
+    # Requests aborted while rendering when block_resources is on.
+    BLOCKED_RESOURCE_TYPES = BLOCKED_RESOURCE_TYPES
+    BLOCKED_DOMAINS = BLOCKED_DOMAINS
+
+    def __init__(self, rate_limit: float = None, burst: int = None, humanize: bool = True,
+                 render_policy: str = "browser", use_catalogue: bool = False, block_resources: bool = False,
+                 wait_until: str = "networkidle", archive_dir: str = None, replay: bool = False,
+                 skip_unchanged: bool = True, recheck_after: float = RECHECK_AFTER,
+                 capture_responses: bool = False, page_deadline: float = PAGE_DEADLINE, run_budget: float = None):
+        # The options as passed, parse workers build their instance with them.
+        self.init_kwargs = {name: value for name, value in locals().items()
+                            if name != "self"}
+        if render_policy not in RENDER_POLICIES:
+            raise ValueError(
+                f"Render policy {render_policy} is not supported. Use one of {RENDER_POLICIES}.")
+        if replay and not archive_dir:
+            raise ValueError("Replay mode needs an archive_dir to read from.")
+
         self.SHOP = ""
         self.URL = ""
         self.EXTRACT_URL_LINK = ""
         self.HEADERS = headers
+        self.browser_pool = BrowserPool(
+            n_browsers=BROWSER_POOL_SIZE,
+            contexts_per_browser=CONTEXTS_PER_BROWSER,
+            max_context_uses=MAX_CONTEXT_USES,
+        )
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.humanize = humanize
+        self.render_policy = render_policy
+        self.use_catalogue = use_catalogue
+        self._catalogue = None
+        self.wait_until = wait_until
+        self.blocker = RequestBlocker(
+            self.BLOCKED_RESOURCE_TYPES, self.BLOCKED_DOMAINS) if block_resources else None
+        self.archive = HtmlArchive(archive_dir) if archive_dir else None
+        self.replay = replay
+        # A replay exists to re-run transforms, so it never skips pages.
+        self.skip_unchanged = skip_unchanged and not replay
+        # None only scrapes pages that are not DONE yet.
+        self.recheck_after = recheck_after
+        self.fingerprints = {}
+        self.new_fingerprints = {}
+        self.capture_responses = capture_responses
+        self.captured = {}
+        self.metrics = Metrics("scrape")
+        self.loaders = {}
+        # URLs of rows the loaders left out, their pages are not loaded.
+        self.skipped_urls = set()
+        self._status_writer = None
+        self.parser = resolve_parser(self.PARSER)
+        self.policy = FetchPolicy(
+            max_attempts=MAX_RETRIES,
+            backoff_base=BACKOFF_BASE,
+            backoff_max=BACKOFF_MAX,
+            page_deadline=page_deadline,
+            run_budget=run_budget,
+            failure_threshold=BREAKER_THRESHOLD,
+            reset_timeout=BREAKER_RESET,
+            metrics=self.metrics,
+        )
+        self.http = AsyncHttpClient(
+            headers=http_headers,
+            timeout=REQUEST_TIMEOUT,
+            throttle=self.throttle,
+            metrics=self.metrics,
+            policy=self.policy,
+        )
 
-    @retry(
-        wait=wait_random(min=MIN_WAIT_BETWEEN_REQ, max=MAX_WAIT_BETWEEN_REQ),
-        stop=stop_after_attempt(MAX_RETRIES),
-        retry=retry_if_exception_type(requests.RequestException),
-        reraise=True,
-    )
-    async def extract_scrape_content(url, selector):
-        soup = None
-        browser = None
+    async def throttle(self, url: str) -> float:
+        return await scheduler.acquire(url, self.rate_limit, self.burst)
+
+    async def prepare_page(self, page):
+        await page.set_extra_http_headers(headers)
+        if self.blocker is not None:
+            return await self.blocker.attach(page)
+
+    def record_traffic(self, url: str, traffic):
+        if traffic is None:
+            return
+
+        self.metrics.incr("requests_blocked", traffic.blocked_requests)
+        self.metrics.incr("est_bytes_saved", traffic.est_bytes_saved)
+        self.metrics.incr("bytes_loaded", traffic.bytes_loaded)
+        print(f"Traffic for {url}: {traffic.as_dict()}")
+
+    async def render_html(self, url, selector, capture: bool = False) -> str:
+        # Errors propagate so the fetch policy can retry them and count them
+        # against the host's circuit breaker.
+        async with self.browser_pool.page() as page:
+            traffic = await self.prepare_page(page)
+            response_capture = None
+            if capture:
+                response_capture = ResponseCapture(
+                    self.CAPTURE_URL_PATTERNS, self.CAPTURE_OPERATIONS)
+                response_capture.attach(page)
+
+            await self.throttle(url)
+            await page.goto(url, wait_until=self.wait_until)
+
+            if response_capture is not None:
+                complete = await response_capture.wait_for(
+                    lambda bodies: self.capture_complete(bodies, url), CAPTURE_TIMEOUT)
+                # A copy, late responses keep being appended to bodies.
+                if response_capture.bodies:
+                    self.captured[url] = list(response_capture.bodies)
+
+                # The data is in, no need to wait for the DOM or parse it.
+                if complete:
+                    self.metrics.incr("pages_captured")
+                    self.record_traffic(url, traffic)
+                    return None
+
+            try:
+                await page.wait_for_selector(selector, timeout=SELECTOR_TIMEOUT * 1000)
+            except PlaywrightTimeoutError as e:
+                # The page loaded, a missing element says nothing about
+                # the host's health.
+                raise ContentMissing(f"{selector} not found on {url}.") from e
+
+            if self.humanize:
+                await self._humanize(page)
+
+            rendered_html = await page.content()
+            self.record_traffic(url, traffic)
+            return rendered_html
+
+    async def render_with_policy(self, url, selector, capture: bool = False) -> str:
         try:
-            async with async_playwright() as p:
-                browser_args = {
-                    "headless": True,
-                    "args": ["--disable-blink-features=AutomationControlled"]
-                }
-
-                browser = await p.chromium.launch(**browser_args)
-                context = await browser.new_context(
-                    locale="en-US",
-                    user_agent=UserAgent().random,
-                    viewport={"width": 1280, "height": 800},
-                    device_scale_factor=1,
-                    is_mobile=False,
-                    has_touch=False,
-                    screen={"width": 1280, "height": 800},
-                    permissions=["geolocation"],
-                    geolocation={"latitude": 14.5995, "longitude": 120.9842},
-                    timezone_id="Asia/Manila"
-                )
-
-                page = await context.new_page()
-
-                await page.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-                await page.set_extra_http_headers(headers)
-                await page.goto(url, wait_until="networkidle")
-                await page.wait_for_selector(selector, timeout=300000)
-
-                for _ in range(random.randint(3, 6)):
-                    await page.mouse.wheel(0, random.randint(300, 700))
-                    await asyncio.sleep(random.uniform(0.5, 1))
-
-                for _ in range(random.randint(5, 10)):
-                    await page.mouse.move(random.randint(0, 800), random.randint(0, 600))
-                    await asyncio.sleep(random.uniform(0.5, 1))
-
-                rendered_html = await page.content()
-                return BeautifulSoup(rendered_html, "html.parser")
+            return await self.policy.call(url, self.render_html, url, selector, capture)
+
+        except FetchDeferred:
+            raise
 
         except Exception as e:
-            print(f"An error occurred: {e}")
+            print(f"Failed to render {url}: {e!r}")
+            self.metrics.incr("render_failures")
 
-        finally:
-            if browser:
-                await browser.close()
-
-    @retry(
-        wait=wait_random(min=MIN_WAIT_BETWEEN_REQ, max=MAX_WAIT_BETWEEN_REQ),
-        stop=stop_after_attempt(MAX_RETRIES),
-        retry=retry_if_exception_type(requests.RequestException),
-        reraise=True,
-    )
-    def extract_from_url(self, method: str, url: str, params: dict = None, data: dict = None, headers: dict = None, verify: bool = True) -> BeautifulSoup:
+    async def extract_scrape_content(self, url, selector):
+        rendered_html = await self.render_with_policy(url, selector)
+        if rendered_html is not None:
+            return self.make_soup(rendered_html)
+
+    def make_soup(self, html, partial: bool = False) -> BeautifulSoup:
+        start = time.perf_counter()
+        soup = None
+        if partial and self.PARSE_REGIONS and isinstance(html, str):
+            soup = make_soup(extract_regions(
+                html, self.PARSE_REGIONS), self.parser)
+            if all(soup.select_one(s) for s in self.PRODUCT_SELECTORS):
+                self.metrics.incr("pages_partial_parse")
+            else:
+                self.metrics.incr("partial_parse_fallbacks")
+                soup = None
+
+        if soup is None:
+            soup = make_soup(html, self.parser)
+        self.metrics.observe("parse", time.perf_counter() - start)
+        return soup
+
+    async def _humanize(self, page):
+        for _ in range(random.randint(3, 6)):
+            await page.mouse.wheel(0, random.randint(300, 700))
+            await asyncio.sleep(random.uniform(0.5, 1))
+
+        for _ in range(random.randint(5, 10)):
+            await page.mouse.move(random.randint(0, 800), random.randint(0, 600))
+            await asyncio.sleep(random.uniform(0.5, 1))
+
+    def archive_page(self, url: str, content: str):
+        if self.archive is not None and content is not None:
+            self.archive.put(url, content)
+
+    async def fetch_raw(self, url: str, selector: str, capture: bool = False, render: bool = False) -> tuple:
+        # Returns the page HTML and where it came from: "replay", "http" or
+        # "browser". HTTP responses are archived by the caller once it has
+        # checked they are complete.
+        if self.replay:
+            if capture:
+                responses = self.archive.get(url + "#responses")
+                if responses is not None:
+                    self.captured[url] = json.loads(responses)
+
+            html = self.archive.get(url)
+            if html is None and url not in self.captured:
+                print(f"{url} is not in the archive.")
+                self.metrics.incr("replay_missing")
+                return None, "replay"
+
+            self.metrics.incr("pages_replayed")
+            return html, "replay"
+
+        if self.render_policy in ("http", "auto") and not capture and not render:
+            return await self.extract_html(url), "http"
+
+        html = await self.render_with_policy(url, selector, capture)
+        self.archive_page(url, html)
+        if url in self.captured:
+            self.archive_page(url + "#responses", json.dumps(self.captured[url]))
+        self.metrics.incr("pages_browser")
+        return html, "browser"
+
+    def accept_http(self, url: str, html: str, complete: bool) -> bool:
+        # Whether an HTTP response can be used as it is, rather than being
+        # rendered in the browser.
+        if complete:
+            self.archive_page(url, html)
+            self.metrics.incr("pages_http")
+            return True
+
+        if self.render_policy == "http":
+            self.metrics.incr("pages_http_incomplete")
+            return True
+
+        print(f"HTTP response for {url} is incomplete, rendering it instead.")
+        self.metrics.incr("http_fallbacks")
+        return False
+
+    async def fetch_page(self, url: str, selector: str, required: list = None, capture: bool = False,
+                         partial: bool = False) -> BeautifulSoup:
+        required = required or ([selector] if selector else [])
+
+        html, source = await self.fetch_raw(url, selector, capture)
+        soup = self.make_soup(html, partial) if html else None
+        if source != "http":
+            return soup
+
+        complete = soup is not None and all(
+            soup.select_one(s) for s in required)
+        if self.accept_http(url, html, complete):
+            return soup
+
+        html, source = await self.fetch_raw(url, selector, capture, render=True)
+        return self.make_soup(html, partial) if html else None
+
+    async def close(self):
+        for loader in self.loaders.values():
+            loader.close()
+        if self._status_writer is not None:
+            self._status_writer.close()
+        await self.browser_pool.close()
+        await self.http.close()
+        self.metrics.report(LATENCY_HISTOGRAMS)
+        if self.policy.breaker.open_hosts():
+            print(f"Open circuits: {self.policy.breaker.open_hosts()}")
+        print(f"Scheduler wait time per host: {scheduler.stats()}")
+
+    def close_browser_pool(self):
+        asyncio.run(self.close())
+
+    async def extract_from_url(self, method: str, url: str, params: dict = None, data: dict = None,
+                               headers: dict = None) -> BeautifulSoup:
         try:
-            # Parse request response
-            response = self.session.request(
-                method=method, url=url, params=params, data=data, headers=headers, verify=verify)
+            response = await self.http.request(
+                method, url, params=params, data=data, headers=headers)
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, "html.parser")
+            soup = self.make_soup(response.content)
             print(
                 f"Successfully extracted data from {url} {response.status_code}"
             )
-            sleep_time = random.uniform(
-                MIN_WAIT_BETWEEN_REQ, MAX_WAIT_BETWEEN_REQ)
-            print(f"Sleeping for {sleep_time} seconds...")
             return soup
 
+        except FetchDeferred:
+            raise
+
+        except Exception as e:
+            print(f"Error in parsing {url}: {e}")
+
+    async def extract_html(self, url: str) -> str:
+        try:
+            response = await self.http.get(url)
+            response.raise_for_status()
+            print(
+                f"Successfully extracted data from {url} {response.status_code} ({response.http_version})"
+            )
+            return response.text
+
+        except FetchDeferred:
+            raise
+
         except Exception as e:
             print(f"Error in parsing {url}: {e}")
 
+    async def fetch_json(self, url: str, params: dict = None):
+        # Any failure to get JSON back raises CatalogueUnavailable, so the
+        # callers fall back to scraping the HTML pages.
+        key = str(httpx.URL(url, params=params))
+        if self.replay:
+            content = self.archive.get(key)
+            return json.loads(content) if content is not None else None
+
+        try:
+            response = await self.http.get(url, params=params)
+            if response.status_code in (401, 403, 404):
+                return None
+
+            response.raise_for_status()
+            data = response.json()
+
+        except (httpx.HTTPStatusError, httpx.TransportError, asyncio.TimeoutError) as e:
+            raise CatalogueUnavailable(f"Failed to fetch {url}: {e!r}") from e
+
+        except ValueError as e:
+            raise CatalogueUnavailable(f"{url} did not return JSON: {e}") from e
+
+        self.archive_page(key, response.text)
+        return data
+
+    def extract_json(self, url: str, params: dict = None):
+        return asyncio.run(self.fetch_json(url, params))
+
     @abstractmethod
     def extract_links(self) -> pd.DataFrame:
         pass
 
+    def count_listing_pages(self, soup: BeautifulSoup) -> int:
+        raise NotImplementedError
+
+    def parse_listing(self, soup: BeautifulSoup) -> list:
+        raise NotImplementedError
+
+    async def extract_paginated_links(self, template: str, n_pages: int, selector: str,
+                                      first_soup: BeautifulSoup = None) -> list:
+        limit = asyncio.Semaphore(LISTING_CONCURRENCY)
+
+        async def fetch(page):
+            if page == 1 and first_soup is not None:
+                return first_soup
+
+            async with limit:
+                try:
+                    return await self.fetch_page(template.format(page=page), selector)
+                except FetchDeferred as e:
+                    print(e)
+
+        soups = await asyncio.gather(*(fetch(page) for page in range(1, n_pages + 1)))
+
+        urls = []
+        for page, soup in enumerate(soups, start=1):
+            if soup is None:
+                print(f"Failed to extract listing page {page} of {n_pages}.")
+                continue
+            urls.extend(self.parse_listing(soup))
+
+        return list(dict.fromkeys(urls))
+
+    def extract_listing(self, url: str, selector: str) -> pd.DataFrame:
+        soup = asyncio.run(self.fetch_page(url, selector))
+        n_pages = self.count_listing_pages(soup)
+        template = self.LISTING_PAGE_TEMPLATE.format(url=url, page="{page}")
+
+        urls = asyncio.run(self.extract_paginated_links(
+            template, n_pages, selector, soup))
+        print(f"Found {len(urls)} product links on {n_pages} pages of {url}")
+
+        df = pd.DataFrame({"url": urls})
+        df.insert(0, "shop", self.SHOP)
+        return df
+
     @abstractmethod
     def transform(self, soup: BeautifulSoup, url: str) -> pd.DataFrame:
         pass
 
+    @classmethod
+    def feature_extractor(cls) -> FeatureExtractor:
+        if cls not in feature_extractors:
+            feature_extractors[cls] = FeatureExtractor(
+                cls.FEATURE_RULES, cls.FEATURE_FLAGS, cls.FEATURE_PER_LINE)
+        return feature_extractors[cls]
+
+    def spec_text(self, soup: BeautifulSoup) -> str:
+        raise NotImplementedError
+
+    def features_from_text(self, text: str) -> dict:
+        return self.feature_extractor().extract(text)
+
+    def extract_features(self, soup: BeautifulSoup) -> dict:
+        return self.features_from_text(self.spec_text(soup))
+
     def extract_from_sql(self, db_conn: Engine, sql: str) -> pd.DataFrame:
         try:
             return pd.read_sql(sql, db_conn)
@@ -145,40 +546,461 @@ class ProductsETL(ABC):
             print(e)
             raise e
 
-    def load(self, data: pd.DataFrame, db_conn: Engine, table_name: str):
+    def loader(self, db_conn: Engine, table_name: str) -> CopyLoader:
+        if table_name not in self.loaders:
+            self.loaders[table_name] = CopyLoader(db_conn, table_name)
+        self.loaders[table_name].metrics = self.metrics
+        return self.loaders[table_name]
+
+    def load(self, data, db_conn: Engine, table_name: str):
+        # Written before returning, callers that batch do so themselves.
+        loader = self.loader(db_conn, table_name)
+        loader.add(data)
+        loader.flush()
+        self.skipped_urls.update(row.get("url")
+                                 for row in loader.take_skipped())
+
+    def was_skipped(self, url: str) -> bool:
+        # Whether the loaders left out a row of url since it was last asked.
+        if url not in self.skipped_urls:
+            return False
+        self.skipped_urls.discard(url)
+        return True
+
+    def fetch_catalogue(self) -> dict:
+        raise CatalogueUnavailable(f"{self.SHOP} has no catalogue source.")
+
+    def get_catalogue(self) -> dict:
+        # refresh_links and run share one catalogue download per process.
+        if self._catalogue is None:
+            self._catalogue = self.fetch_catalogue()
+        return self._catalogue
+
+    def catalogue_key(self, url: str) -> str:
+        return url
+
+    def catalogue_url(self, product: dict) -> str:
+        raise NotImplementedError
+
+    def extract_catalogue_links(self) -> pd.DataFrame:
+        urls = [self.catalogue_url(product)
+                for product in self.get_catalogue().values()]
+
+        df = pd.DataFrame({"url": urls})
+        df.insert(0, "shop", self.SHOP)
+        return df
+
+    def transform_catalogue(self, product: dict, url: str) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def run_catalogue(self, db_conn: Engine, table_name: str, df_urls: pd.DataFrame) -> pd.DataFrame:
         try:
-            n = data.shape[0]
-            data.to_sql(table_name, db_conn, if_exists="append", index=False)
-            print(
-                f"Successfully loaded {n} records to the {table_name}.")
+            catalogue = self.get_catalogue()
+        except (CatalogueUnavailable, FetchDeferred) as e:
+            print(f"Catalogue unavailable, scraping pages instead: {e}")
+            return df_urls
 
-        except Exception as e:
-            print(e)
-            raise e
+        frames = []
+        statuses = []
+        remaining = []
+        fingerprints = {}
+        urls = {}
+        now = dt.now().strftime("%Y-%m-%d %H:%M:%S")
+        for i, row in df_urls.iterrows():
+            product = catalogue.get(self.catalogue_key(row["url"]))
+            if product is None:
+                remaining.append(i)
+                continue
+
+            fingerprint = fingerprint_data(product)
+            if self.is_unchanged(row["id"], fingerprint):
+                statuses.append((row["id"], "DONE"))
+                continue
+
+            try:
+                df = self.transform_catalogue(product, row["url"])
+            except Exception as e:
+                print(f"Error in transforming {row['url']}: {e}")
+                df = None
+
+            if df is not None:
+                frames.append(df)
+                fingerprints[row["id"]] = fingerprint
+                urls[row["id"]] = row["url"]
+            statuses.append((row["id"], "DONE" if df is not None else "FAILED"))
+
+        try:
+            if frames:
+                self.load(pd.concat(frames, ignore_index=True),
+                          db_conn, table_name)
+        except Exception:
+            # The pages are scraped again next run.
+            self.metrics.incr("load_failures")
+            statuses = [(pkey, "FAILED" if pkey in fingerprints else status)
+                        for pkey, status in statuses]
+            fingerprints = {}
 
-    def run(self, db_conn: Engine, table_name: str, selector: str = None):
-        sql = get_sql_from_file("select_unscraped_urls.sql")
+        # Products with a row the loader left out are scraped again.
+        failed = {pkey for pkey, url in urls.items()
+                  if pkey in fingerprints and self.was_skipped(url)}
+        if failed:
+            statuses = [(pkey, "FAILED" if pkey in failed else status)
+                        for pkey, status in statuses]
+            fingerprints = {pkey: fingerprint for pkey, fingerprint in fingerprints.items()
+                            if pkey not in failed}
+
+        # Only fingerprints of loaded rows, or a failed load would be
+        # skipped as unchanged next run.
+        if self.skip_unchanged:
+            self.new_fingerprints.update(fingerprints)
+        self.write_statuses(db_conn, [(pkey, status, now)
+                            for pkey, status in statuses])
+
+        self.metrics.incr("pages_catalogue", len(statuses))
+        print(
+            f"Catalogue covered {len(statuses)} of {len(df_urls)} URLs for {self.SHOP}.")
+        return df_urls.loc[remaining]
+
+    def load_fingerprints(self, db_conn: Engine):
+        self.new_fingerprints = {}
+        if not self.skip_unchanged:
+            self.fingerprints = {}
+            return
+
+        sql = get_sql_from_file("select_url_fingerprints.sql")
         sql = sql.format(shop=self.SHOP)
-        df_urls = self.extract_from_sql(db_conn, sql)
+        df = self.extract_from_sql(db_conn, sql)
+        self.fingerprints = dict(zip(df["url_id"], df["fingerprint"]))
 
-        for i, row in df_urls.iterrows():
-            pkey = row["id"]
-            url = row["url"]
+    def save_fingerprints(self, db_conn: Engine):
+        if not self.skip_unchanged or not self.new_fingerprints:
+            return
 
-            now = dt.now().strftime("%Y-%m-%d %H:%M:%S")
+        now = dt.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = [{"url_id": int(pkey), "fingerprint": fingerprint, "updated_date": now}
+                for pkey, fingerprint in self.new_fingerprints.items()]
+        execute_query(db_conn, get_sql_from_file(
+            "upsert_url_fingerprints.sql"), rows)
+        self.fingerprints.update(self.new_fingerprints)
+        self.new_fingerprints = {}
+
+    def is_unchanged(self, pkey: int, fingerprint: str) -> bool:
+        if not self.skip_unchanged:
+            return False
+
+        if self.fingerprints.get(pkey) == fingerprint:
+            self.metrics.incr("pages_unchanged")
+            return True
+        return False
+
+    def iter_urls(self, db_conn: Engine, chunksize: int = URL_BATCH_SIZE):
+        # Replays re-run every archived page, not only the unscraped ones.
+        # Otherwise DONE pages are fetched again once recheck_after hours
+        # old, and the unchanged ones skipped by their fingerprint.
+        if self.replay:
+            sql_file = "select_shop_urls.sql"
+        elif self.recheck_after is not None:
+            sql_file = "select_urls_to_recheck.sql"
+        else:
+            sql_file = "select_unscraped_urls.sql"
+        sql = get_sql_from_file(sql_file)
+        sql = sql.format(shop=self.SHOP, recheck_after=float(self.recheck_after or 0))
+
+        # A server-side cursor hands the URLs over chunk by chunk instead of
+        # reading the whole list in.
+        with db_conn.connect() as conn:
+            conn = conn.execution_options(stream_results=True)
+            yield from pd.read_sql(sql, conn, chunksize=chunksize)
+
+    def capture_complete(self, responses: list, url: str) -> bool:
+        return False
 
-            soup = asyncio.run(self.extract_scrape_content(url, selector))
+    def transform_responses(self, responses: list, url: str) -> pd.DataFrame:
+        return None
+
+    def capture_fingerprint_data(self, responses: list, url: str):
+        # The part of the captured responses transform_responses reads, None
+        # to fingerprint the page instead.
+        return responses
+
+    def transform_soup(self, url: str, soup: BeautifulSoup, responses: list = None,
+                       known_fingerprint: str = None) -> tuple:
+        fingerprint = None
+        if self.skip_unchanged:
+            data = self.capture_fingerprint_data(
+                responses, url) if responses else None
+            if data is not None:
+                fingerprint = fingerprint_data(data)
+            elif soup is not None:
+                fingerprint = fingerprint_soup(
+                    soup, self.FINGERPRINT_SELECTORS or self.PRODUCT_SELECTORS)
+            if known_fingerprint is not None and known_fingerprint == fingerprint:
+                return "UNCHANGED", None, fingerprint
+
+        df = self.transform_responses(responses, url) if responses else None
+        if df is None and soup is not None:
             df = self.transform(soup, url)
 
-            if df is not None:
-                self.load(df, db_conn, table_name)
-                update_url_scrape_status(db_conn, pkey, "DONE", now)
+        return ("DONE" if df is not None else "FAILED"), df, fingerprint
 
-            else:
-                update_url_scrape_status(db_conn, pkey, "FAILED", now)
+    def parse_page(self, url: str, html: str, responses: list = None, known_fingerprint: str = None,
+                   required: list = None) -> tuple:
+        # The CPU side of a product page, run in a parse worker process. Rows
+        # come back as plain records so only compact data crosses back.
+        start = time.perf_counter()
+        soup = self.make_soup(html, partial=True) if html else None
+        if required and (soup is None or not all(soup.select_one(s) for s in required)):
+            return "INCOMPLETE", None, None, time.perf_counter() - start
+
+        status, df, fingerprint = self.transform_soup(
+            url, soup, responses, known_fingerprint)
+        records = df.to_dict("records") if df is not None else None
+        return status, records, fingerprint, time.perf_counter() - start
+
+    def known_fingerprint(self, pkey: int) -> str:
+        return self.fingerprints.get(pkey) if self.skip_unchanged else None
+
+    def status_writer(self, db_conn: Engine) -> StatusWriter:
+        if self._status_writer is None:
+            self._status_writer = StatusWriter(db_conn)
+        self._status_writer.metrics = self.metrics
+        return self._status_writer
+
+    def write_statuses(self, db_conn: Engine, statuses: list):
+        # Written before returning, callers that batch do so themselves.
+        # A replay leaves the live crawl state in etl.urls as it is.
+        if self.replay:
+            return
+
+        writer = self.status_writer(db_conn)
+        writer.add_many(statuses)
+        writer.flush()
+
+    def run(self, db_conn: Engine, table_name: str, selector: str = None, concurrency: int = None,
+            per_host_concurrency: int = None, parse_workers: int = None):
+        # Without a concurrency the pipeline fetches one page at a time.
+        concurrency = concurrency or 1
+        return asyncio.run(self.run_async(
+            db_conn, table_name, selector, concurrency, per_host_concurrency or concurrency, parse_workers))
+
+    async def run_async(self, db_conn: Engine, table_name: str, selector: str = None, concurrency: int = 8,
+                        per_host_concurrency: int = 4, parse_workers: int = None,
+                        parse_queue_size: int = PARSE_QUEUE_SIZE):
+        # URLs stream through fetch -> parse -> load -> status stages joined
+        # by bounded queues, so memory stays flat however many URLs a shop
+        # has. concurrency is the number of fetch workers. parse_workers runs
+        # parsing and transform in that many worker processes, otherwise
+        # pages are parsed on the event loop.
+        self.load_fingerprints(db_conn)
+
+        metrics = self.metrics = self.http.metrics = self.policy.metrics = Metrics(
+            f"{self.SHOP} run")
+        self.policy.start_run()
+        loop = asyncio.get_running_loop()
+        host_limits = defaultdict(
+            lambda: asyncio.Semaphore(per_host_concurrency))
+        required = self.PRODUCT_SELECTORS if self.render_policy == "auto" else None
+        requeued = set()
+
+        # Every in-flight fetch needs its own page, so size the pool to match.
+        if not self.browser_pool.started:
+            self.browser_pool.contexts_per_browser = max(
+                self.browser_pool.contexts_per_browser,
+                math.ceil(min(concurrency, per_host_concurrency) / self.browser_pool.n_browsers))
+
+        # Spawned rather than forked, the parent has an event loop, a browser
+        # driver and open connections that must not be copied.
+        pool = None
+        if parse_workers:
+            pool = ProcessPoolExecutor(
+                max_workers=parse_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_parse_worker,
+                initargs=(type(self), self.SHOP, self.URL,
+                          self.EXTRACT_URL_LINK, self.init_kwargs),
+            )
+
+        def finish(outcome: str):
+            metrics.incr(outcome)
+            metrics.incr("finished")
+            n = metrics.counters["finished"]
+            if n % PROGRESS_EVERY == 0:
+                print(
+                    f"[{self.SHOP}] {n}/{metrics.counters['urls']} pages, "
+                    f"{metrics.rate('finished'):.2f} pages/sec, "
+                    f"fetch {metrics.rate('fetched'):.2f}/sec, "
+                    f"queues: fetch {fetch_stage.depth()}, parse {parse_stage.depth()}, "
+                    f"load {load_stage.depth()}, status {status_stage.depth()}, "
+                    f"in flight: {metrics.gauges['in_flight']}, "
+                    f"deferred: {metrics.counters['deferred']}")
+
+        async def read_urls():
+            chunks = self.iter_urls(db_conn)
+            use_catalogue = self.use_catalogue
+            try:
+                while True:
+                    df_urls = await asyncio.to_thread(next, chunks, None)
+                    if df_urls is None:
+                        break
+
+                    if use_catalogue:
+                        df_urls = self.run_catalogue(
+                            db_conn, table_name, df_urls)
+                        # The catalogue is downloaded once, don't retry it
+                        # for every chunk if that failed.
+                        use_catalogue = self._catalogue is not None
+
+                    for pkey, url in zip(df_urls["id"], df_urls["url"]):
+                        metrics.incr("urls")
+                        await fetch_stage.put((pkey, url, False))
+            finally:
+                chunks.close()
+
+        async def fetch(item):
+            pkey, url, render = item
+            try:
+                async with host_limits[urlparse(url).netloc]:
+                    metrics.gauge_add("in_flight", 1)
+                    start = time.perf_counter()
+                    try:
+                        html, source = await self.fetch_raw(url, selector, self.capture_responses, render)
+                    finally:
+                        metrics.gauge_add("in_flight", -1)
+                        metrics.observe("fetch", time.perf_counter() - start)
+            except FetchDeferred:
+                # Left as it is in etl.urls so the next run retries it.
+                finish("deferred")
+                return
+
+            metrics.incr("fetched")
+            await parse_stage.put((pkey, url, html, source))
+
+        def render_instead(pkey, url):
+            # Put back from a separate task, waiting on a full fetch queue
+            # here could deadlock with fetchers waiting on us.
+            task = asyncio.create_task(fetch_stage.put((pkey, url, True)))
+            requeued.add(task)
+            task.add_done_callback(requeued.discard)
+
+        async def parse(item):
+            pkey, url, html, source = item
+            responses = self.captured.pop(url, None)
+            if html is None and responses is None:
+                # A failed HTTP fetch falls back to the browser like an
+                # incomplete one, as in fetch_page.
+                if source == "http" and not self.accept_http(url, html, False):
+                    render_instead(pkey, url)
+                # Replays skip pages missing from the archive.
+                elif self.replay:
+                    finish("failed")
+                else:
+                    await load_stage.put((pkey, url, "FAILED", None, None))
+                return
+
+            page_required = required if source == "http" else None
+            try:
+                if pool is not None:
+                    status, records, fingerprint, parse_time = await loop.run_in_executor(
+                        pool, parse_in_worker, url, html, responses, self.known_fingerprint(pkey), page_required)
+                    metrics.observe("parse", parse_time)
+                else:
+                    status, records, fingerprint, _ = self.parse_page(
+                        url, html, responses, self.known_fingerprint(pkey), page_required)
+            except Exception as e:
+                print(f"Error in processing {url}: {e!r}")
+                status, records, fingerprint = "FAILED", None, None
+            metrics.incr("parsed")
+
+            if status == "INCOMPLETE" or source == "http":
+                if not self.accept_http(url, html, status != "INCOMPLETE"):
+                    render_instead(pkey, url)
+                    return
+
+            await load_stage.put((pkey, url, status, records, fingerprint))
+
+        async def load(batch):
+            rows = [record for _, _, status, records, _ in batch
+                    if status == "DONE" for record in records]
+            try:
+                if rows:
+                    await asyncio.to_thread(self.load, rows, db_conn, table_name)
+            except Exception:
+                # The pages are scraped again next run.
+                metrics.incr("load_failures")
+                batch = [(pkey, url, "FAILED" if status == "DONE" else status, records, None)
+                         for pkey, url, status, records, _ in batch]
+
+            now = dt.now().strftime("%Y-%m-%d %H:%M:%S")
+            for pkey, url, status, records, fingerprint in batch:
+                # A page with a row the loader left out is scraped again.
+                if status == "DONE" and self.was_skipped(url):
+                    status, fingerprint = "FAILED", None
+                if status == "UNCHANGED":
+                    metrics.incr("pages_unchanged")
+                if fingerprint is not None and status == "DONE" and self.skip_unchanged:
+                    self.new_fingerprints[pkey] = fingerprint
+
+                done = status in ("DONE", "UNCHANGED")
+                finish("done" if done else "failed")
+                await status_stage.put((pkey, "DONE" if done else "FAILED", now))
+
+            await asyncio.to_thread(self.save_fingerprints, db_conn)
+
+        async def write_statuses(batch):
+            await asyncio.to_thread(self.write_statuses, db_conn, batch)
+
+        fetch_stage = Stage("fetch", fetch, concurrency,
+                            concurrency * 2, metrics)
+        parse_stage = Stage("parse", parse, parse_workers or 1,
+                            parse_queue_size, metrics)
+        load_stage = BatchStage("load", load, LOAD_BATCH_ROWS, FLUSH_INTERVAL, PARSE_QUEUE_SIZE, metrics,
+                                size=lambda item: len(item[3] or ()) or 1)
+        status_stage = BatchStage("status", write_statuses, STATUS_BATCH_SIZE,
+                                  FLUSH_INTERVAL, STATUS_BATCH_SIZE * 2, metrics)
+        stages = [fetch_stage, parse_stage, load_stage, status_stage]
+        for stage in stages:
+            stage.start()
+
+        try:
+            await read_urls()
+
+            # Pages sent back for rendering keep fetch and parse going.
+            while True:
+                await fetch_stage.drain()
+                await parse_stage.drain()
+                if not requeued:
+                    break
+                await asyncio.gather(*requeued)
+
+            await load_stage.drain()
+            await status_stage.drain()
+            print(f"[{self.SHOP}] {metrics.counters['finished']}/{metrics.counters['urls']} pages, "
+                  f"deferred: {metrics.counters['deferred']}")
+
+        finally:
+            for stage in stages:
+                stage.cancel()
+            for task in list(requeued):
+                task.cancel()
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+            self.save_fingerprints(db_conn)
+            await self.close()
 
     def refresh_links(self, db_conn: Engine, table_name: str):
-        df = self.extract_links(self.URL + self.EXTRACT_URL_LINK)
+        df = None
+        if self.use_catalogue:
+            try:
+                df = self.extract_catalogue_links()
+            except (CatalogueUnavailable, FetchDeferred) as e:
+                print(f"Catalogue unavailable, scraping listings instead: {e}")
+
+        try:
+            if df is None:
+                df = self.extract_links(self.URL + self.EXTRACT_URL_LINK)
+        finally:
+            self.close_browser_pool()
+
         if df is not None:
             self.load(df, db_conn, table_name)
 
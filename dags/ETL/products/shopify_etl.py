@@ -0,0 +1,86 @@
+import pandas as pd
+from urllib.parse import urlparse
+from bs4 import BeautifulSoup
+from .products_etl import CatalogueUnavailable
+
+SHOPIFY_PAGE_SIZE = 250
+
+
+class ShopifyMixin:
+    def fetch_catalogue(self) -> dict:
+        handle = self.EXTRACT_URL_LINK.strip('/').split('/')[-1]
+        catalogue_url = f"{self.URL}/collections/{handle}/products.json"
+
+        catalogue = {}
+        page = 1
+        while True:
+            data = self.extract_json(
+                catalogue_url, params={"limit": SHOPIFY_PAGE_SIZE, "page": page})
+            if data is None or "products" not in data:
+                raise CatalogueUnavailable(
+                    f"{catalogue_url} did not return a product list.")
+
+            for product in data["products"]:
+                catalogue[product["handle"]] = product
+
+            if len(data["products"]) < SHOPIFY_PAGE_SIZE:
+                break
+            page += 1
+
+        print(
+            f"Fetched {len(catalogue)} products from {catalogue_url} in {page} requests.")
+        return catalogue
+
+    def catalogue_key(self, url: str) -> str:
+        return urlparse(url).path.rstrip('/').split('/')[-1]
+
+    def catalogue_url(self, product: dict) -> str:
+        return f"{self.URL}/products/{product['handle']}"
+
+    def catalogue_variants(self, product: dict) -> list:
+        return product["variants"]
+
+    def catalogue_variant_name(self, product: dict, variant: dict) -> str:
+        return variant["title"]
+
+    def transform_catalogue(self, product: dict, url: str) -> pd.DataFrame:
+        soup = BeautifulSoup(product.get("body_html") or "", "html.parser")
+        feature_data = self.extract_features(soup)
+
+        product_image_url = product["images"][0]["src"] if product.get(
+            "images") else None
+
+        rows = []
+        for variant in self.catalogue_variants(product):
+            price = float(variant["price"])
+            compare_at_price = float(variant["compare_at_price"]) if variant.get(
+                "compare_at_price") else None
+
+            if compare_at_price and compare_at_price > price:
+                discounted_price = price
+                price = compare_at_price
+                discount_percentage = round(
+                    (price - discounted_price) / price, 2)
+            else:
+                discounted_price = None
+                discount_percentage = None
+
+            image_url = (variant.get("featured_image") or {}).get(
+                "src") or product_image_url
+
+            rows.append({
+                'shop': self.SHOP,
+                'name': product["title"],
+                'brand': product.get("vendor"),
+                'rating': '0/5',
+                'description': soup.get_text(" ", strip=True)[:1000],
+                'url': url,
+                'variant': self.catalogue_variant_name(product, variant),
+                'price': price,
+                'discounted_price': discounted_price,
+                'discount_percentage': discount_percentage,
+                'image_url': image_url,
+                **feature_data,
+            })
+
+        return pd.DataFrame(rows)
@@ -0,0 +1,135 @@
+import pandas as pd
+from urllib.parse import urlparse
+from bs4 import BeautifulSoup
+from .products_etl import CatalogueUnavailable
+
+WOOCOMMERCE_PAGE_SIZE = 100
+WOOCOMMERCE_PARENT_BATCH = 50
+
+
+class WooCommerceMixin:
+    # Product category slug for the Store API, defaults to the last segment
+    # of EXTRACT_URL_LINK.
+    WOOCOMMERCE_CATEGORY = None
+
+    def _store_api_pages(self, params: dict) -> list:
+        api_url = f"{self.URL}/wp-json/wc/store/v1/products"
+
+        items = []
+        page = 1
+        while True:
+            data = self.extract_json(
+                api_url, params={**params, "per_page": WOOCOMMERCE_PAGE_SIZE, "page": page})
+            if isinstance(data, dict) and "code" in data:
+                # A Store API error body, e.g. an unknown category.
+                raise CatalogueUnavailable(
+                    f"{api_url} returned {data['code']}: {data.get('message')}")
+            if not isinstance(data, list):
+                raise CatalogueUnavailable(
+                    f"{api_url} did not return a product list.")
+
+            items.extend(data)
+            if len(data) < WOOCOMMERCE_PAGE_SIZE:
+                return items
+            page += 1
+
+    def fetch_catalogue(self) -> dict:
+        try:
+            return self._fetch_store_api_catalogue()
+        except (KeyError, TypeError) as e:
+            # Store API versions differ, a payload missing what is read
+            # below is treated like an unavailable API.
+            raise CatalogueUnavailable(
+                f"Unexpected Store API response from {self.URL}: {e!r}") from e
+
+    def _fetch_store_api_catalogue(self) -> dict:
+        category = self.WOOCOMMERCE_CATEGORY or self.EXTRACT_URL_LINK.strip(
+            '/').split('/')[-1]
+        products = self._store_api_pages({"category": category})
+        if not products:
+            raise CatalogueUnavailable(
+                f"Store API returned no products for category {category}.")
+
+        # Variation prices are not part of the parent product, fetch them in
+        # bulk by parent id instead of one request per variation.
+        parent_ids = [product["id"] for product in products
+                      if product.get("variations")]
+        variations = {}
+        for i in range(0, len(parent_ids), WOOCOMMERCE_PARENT_BATCH):
+            batch = parent_ids[i:i + WOOCOMMERCE_PARENT_BATCH]
+            for variation in self._store_api_pages({"type": "variation", "parent": ",".join(map(str, batch))}):
+                variations[variation["id"]] = variation
+
+        catalogue = {}
+        for product in products:
+            product["variation_items"] = [variations[v["id"]] for v in product.get("variations", [])
+                                          if v["id"] in variations]
+            catalogue[self.catalogue_key(product["permalink"])] = product
+
+        print(
+            f"Fetched {len(catalogue)} products and {len(variations)} variations from the {self.SHOP} Store API.")
+        return catalogue
+
+    def catalogue_key(self, url: str) -> str:
+        return urlparse(url).path.rstrip('/').split('/')[-1]
+
+    def catalogue_url(self, product: dict) -> str:
+        return product["permalink"]
+
+    def catalogue_brand(self, product: dict) -> str:
+        brands = product.get("brands") or []
+        return brands[0]["name"] if brands else None
+
+    def catalogue_rating(self, product: dict) -> str:
+        if product.get("review_count"):
+            return f"{product['average_rating']}/5"
+        return '0/5'
+
+    def catalogue_variant_name(self, product: dict, variation: dict) -> str:
+        if variation is None:
+            return None
+        return " / ".join(a["value"] for a in variation.get("attributes", []) if a.get("value"))
+
+    def _store_api_prices(self, item: dict) -> tuple:
+        prices = item["prices"]
+        unit = 10 ** prices.get("currency_minor_unit", 2)
+        price = int(prices["price"]) / unit
+        regular_price = int(prices["regular_price"] or prices["price"]) / unit
+
+        if regular_price > price:
+            return regular_price, price, round((regular_price - price) / regular_price, 2)
+        return price, None, None
+
+    def transform_catalogue(self, product: dict, url: str) -> pd.DataFrame:
+        soup = BeautifulSoup(product.get("description") or "", "html.parser")
+        feature_data = self.extract_features(soup)
+
+        product_image_url = product["images"][0]["src"] if product.get(
+            "images") else None
+        short_description = BeautifulSoup(
+            product.get("short_description") or "", "html.parser").get_text(" ", strip=True)
+
+        rows = []
+        for variation in product["variation_items"] or [None]:
+            item = variation or product
+            price, discounted_price, discount_percentage = self._store_api_prices(
+                item)
+            image_url = (item.get("images") or [{}])[
+                0].get("src") or product_image_url
+
+            rows.append({
+                'shop': self.SHOP,
+                'name': BeautifulSoup(product["name"], "html.parser").get_text(),
+                'brand': self.catalogue_brand(product),
+                'rating': self.catalogue_rating(product),
+                'description': (short_description or soup.get_text(" ", strip=True))[:1000],
+                'url': url,
+                'variant': self.catalogue_variant_name(product, variation),
+                'price': price,
+                'discounted_price': discounted_price,
+                'discount_percentage': discount_percentage,
+                'image_url': image_url,
+                **feature_data,
+            })
+
+        return pd.DataFrame(rows)
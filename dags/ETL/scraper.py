@@ -1,7 +1,9 @@
 import os
 import datetime as dt
 from dotenv import load_dotenv
-from ETL.libs.utils import get_db_conn, execute_query, get_sql_from_file
+from ETL.libs.utils import execute_query, get_sql_from_file
+from ETL.libs.db import engine_from_env, report_pool
+from ETL.libs.promotion import promote
 from ETL.products import (
     AbensonETL,
     AnsonsETL,
@@ -16,61 +18,133 @@ from ETL.products import (
 
 
 load_dotenv(dotenv_path="/opt/airflow/.env")
-DB_HOST = os.getenv("DB_HOST")
-DB_PORT = os.getenv("DB_PORT")
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASS")
-DB_NAME = os.getenv("DB_NAME")
-DB_DRIVER = os.getenv("DB_DRIVER")
-
-engine = get_db_conn(
-    DB_DRIVER,
-    DB_USER,
-    DB_PASSWORD,
-    DB_HOST,
-    DB_PORT,
-    DB_NAME,
-)
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "/opt/airflow/archive")
 
 
-def launch_etl(shop: str, selector: str):
+def launch_etl(shop: str, selector: str, concurrency: int = None, per_host_concurrency: int = None,
+               replay: bool = False, run_budget: float = None, parse_workers: int = None):
     start_time = dt.datetime.now()
+    # Created on first use in the worker rather than at import time in the
+    # process that parses the DAGs.
+    engine = engine_from_env()
+    common = {"archive_dir": ARCHIVE_DIR,
+              "replay": replay, "run_budget": run_budget}
     factory = {
-        "Abenson": AbensonETL("Abenson", 'https://www.abenson.com', '/mobile/smartphone.html'),
-        'Ansons': AnsonsETL("Ansons", 'https://ansons.ph', '/product-category/smartphones/'),
-        "CompAsia": CompAsiaETL('CompAsia', 'https://compasia.com.ph', '/collections/smartphones'),
-        'Emcor': EmcorETL("Emcor", 'https://emcor.com.ph', '/product-category/it-products/smartphone/'),
-        "KimStore": KimStoreETL('KimStore', 'https://www.kimstore.com', '/collections/smartphones'),
-        "MxMemoXpress": MxmemoxpressETL("MxMemoXpress", 'https://mxmemoxpress.com', '/all-mobiles'),
-        'MyPhone': MyPhoneETL("MyPhone", 'https://www.myphone.com.ph', '/smartphone'),
-        "PCX": PcxETL('PCX', 'https://pcx.com.ph', '/collections/smartphones'),
-        "SavenEarn": SavenearnETL("SavenEarn", 'https://savenearn.com.ph', '/collections/smartphone'),
+        "Abenson": AbensonETL(
+            "Abenson", 'https://www.abenson.com', '/mobile/smartphone.html',
+            rate_limit=0.5,
+            burst=1,
+            render_policy='browser',
+            capture_responses=True,
+            block_resources=True,
+            wait_until='domcontentloaded',
+            **common,
+        ),
+        'Ansons': AnsonsETL(
+            "Ansons", 'https://ansons.ph', '/product-category/smartphones/',
+            rate_limit=1.0,
+            burst=2,
+            render_policy='auto',
+            use_catalogue=True,
+            block_resources=True,
+            wait_until='domcontentloaded',
+            **common,
+        ),
+        "CompAsia": CompAsiaETL(
+            'CompAsia', 'https://compasia.com.ph', '/collections/smartphones',
+            rate_limit=2.0,
+            burst=4,
+            render_policy='auto',
+            use_catalogue=True,
+            block_resources=True,
+            wait_until='domcontentloaded',
+            **common,
+        ),
+        'Emcor': EmcorETL(
+            "Emcor", 'https://emcor.com.ph', '/product-category/it-products/smartphone/',
+            rate_limit=1.0,
+            burst=2,
+            render_policy='auto',
+            use_catalogue=True,
+            block_resources=True,
+            wait_until='domcontentloaded',
+            **common,
+        ),
+        "KimStore": KimStoreETL(
+            'KimStore', 'https://www.kimstore.com', '/collections/smartphones',
+            rate_limit=2.0,
+            burst=4,
+            render_policy='auto',
+            use_catalogue=True,
+            block_resources=True,
+            wait_until='domcontentloaded',
+            **common,
+        ),
+        "MxMemoXpress": MxmemoxpressETL(
+            "MxMemoXpress", 'https://mxmemoxpress.com', '/all-mobiles',
+            rate_limit=1.0,
+            burst=2,
+            render_policy='auto',
+            use_catalogue=True,
+            block_resources=True,
+            wait_until='domcontentloaded',
+            **common,
+        ),
+        'MyPhone': MyPhoneETL(
+            "MyPhone", 'https://www.myphone.com.ph', '/smartphone',
+            rate_limit=1.0,
+            burst=2,
+            render_policy='auto',
+            use_catalogue=True,
+            block_resources=True,
+            wait_until='domcontentloaded',
+            **common,
+        ),
+        "PCX": PcxETL(
+            'PCX', 'https://pcx.com.ph', '/collections/smartphones',
+            rate_limit=2.0,
+            burst=4,
+            render_policy='auto',
+            use_catalogue=True,
+            block_resources=True,
+            wait_until='domcontentloaded',
+            **common,
+        ),
+        "SavenEarn": SavenearnETL(
+            "SavenEarn", 'https://savenearn.com.ph', '/collections/smartphone',
+            rate_limit=2.0,
+            burst=4,
+            render_policy='auto',
+            use_catalogue=True,
+            block_resources=True,
+            wait_until='domcontentloaded',
+            **common,
+        ),
     }
 
     if shop in factory:
-        execute_query(engine, "TRUNCATE TABLE stg_urls;")
-        factory[shop].refresh_links(engine, "stg_urls")
-
-        sql = get_sql_from_file("insert_into_urls.sql")
-        execute_query(engine, sql)
-
-        execute_query(engine, "TRUNCATE TABLE stg_pet_products;")
-        factory[shop].run(engine, "stg_pet_products", selector)
+        # A replay re-runs transforms over archived pages, so keep the
+        # known URL list as it is.
+        if not replay:
+            execute_query(engine, "TRUNCATE TABLE etl.stg_urls;")
+            factory[shop].refresh_links(engine, "etl.stg_urls")
 
-        sql = get_sql_from_file("insert_into_pet_products.sql")
-        execute_query(engine, sql)
+            sql = get_sql_from_file("insert_into_urls.sql")
+            execute_query(engine, sql)
 
-        sql = get_sql_from_file("insert_into_pet_product_variants.sql")
-        execute_query(engine, sql)
+        execute_query(engine, "TRUNCATE TABLE etl.stg_products;")
+        factory[shop].run(engine, "etl.stg_products", selector,
+                          concurrency, per_host_concurrency, parse_workers)
 
-        sql = get_sql_from_file(
-            "insert_into_pet_product_variant_prices.sql")
-        execute_query(engine, sql)
+        # A replay only re-checks transforms, its rows stay in staging.
+        if not replay:
+            promote(engine)
 
         end_time = dt.datetime.now()
         duration = end_time - start_time
         print(
             f"{shop} (shop={shop}) has ended. Elapsed: {duration}")
+        report_pool()
     else:
         raise ValueError(
             f"Shop {shop} is not supported. Please pass a valid shop.")
@@ -22,9 +22,10 @@ default_args = {
 }
 
 
-def check_and_initialize():
-    from ETL.libs.utils import get_db_conn, get_sql_from_file, execute_query
-    engine = get_db_conn(
+def migrate_schema():
+    from ETL.libs.db import get_engine
+    from ETL.libs.migrations import migrate
+    engine = get_engine(
         DB_DRIVER,
         DB_USER,
         DB_PASSWORD,
@@ -33,19 +34,18 @@ def check_and_initialize():
         DB_NAME,
     )
 
-    sql = get_sql_from_file('init.sql')
-    execute_query(engine, sql)
+    migrate(engine)
 
 
 with DAG(
-    dag_id="init_database_schema",
+    dag_id="migrate_database_schema",
     default_args=default_args,
     schedule_interval=None,
     catchup=False,
-    description="Initializes the smartphone ETL database schema if not present",
+    description="Applies the pending smartphone ETL database schema migrations",
 ) as dag:
 
-    initialize_db = PythonOperator(
-        task_id="check_and_initialize_db",
-        python_callable=check_and_initialize,
+    migrate_db = PythonOperator(
+        task_id="apply_migrations",
+        python_callable=migrate_schema,
     )